@@ -0,0 +1,69 @@
+# auth/backends.py
+
+import importlib
+import logging
+import os
+from types import ModuleType
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Backend name -> module. A backend module provides
+#   async verify_firebase_token(id_token) -> user info dict
+#   async get_firebase_user(uid) -> user record dict
+# and optionally async startup() / shutdown() hooks for the app lifespan.
+# Modules are only imported when selected, so the dev backend never loads
+# firebase_admin and google-auth.
+AUTH_BACKENDS: Dict[str, str] = {
+    "firebase": "auth.firebase_auth",
+    "dev": "auth.firebase_auth_dev",
+}
+
+# AUTH_BACKEND=firebase verifies tokens; the default keeps the development
+# behaviour (decode without verification)
+AUTH_BACKEND = os.getenv("AUTH_BACKEND", "dev")
+
+_loaded: Dict[str, ModuleType] = {}
+
+
+def register_backend(name: str, module_path: str):
+    """Make another backend module selectable through AUTH_BACKEND"""
+    AUTH_BACKENDS[name] = module_path
+    _loaded.pop(name, None)
+
+
+def get_backend(name: Optional[str] = None) -> ModuleType:
+    """Import the selected backend on first use"""
+    name = name or AUTH_BACKEND
+    backend = _loaded.get(name)
+    if backend is None:
+        if name not in AUTH_BACKENDS:
+            raise RuntimeError(f"Unknown AUTH_BACKEND {name!r}; expected one of {', '.join(sorted(AUTH_BACKENDS))}")
+        backend = importlib.import_module(AUTH_BACKENDS[name])
+        if name == "dev":
+            logger.warning("AUTH_BACKEND=dev accepts unverified tokens; do not use in production")
+        _loaded[name] = backend
+    return backend
+
+
+async def verify_token(id_token: str) -> dict:
+    return await get_backend().verify_firebase_token(id_token)
+
+
+async def get_user(uid: str) -> dict:
+    return await get_backend().get_firebase_user(uid)
+
+
+async def startup():
+    """Load and initialize the backend ahead of the first request"""
+    hook = getattr(get_backend(), "startup", None)
+    if hook is not None:
+        await hook()
+
+
+async def shutdown():
+    # Nothing to release if no request ever loaded the backend
+    backend = _loaded.get(AUTH_BACKEND)
+    hook = getattr(backend, "shutdown", None)
+    if hook is not None:
+        await hook()
@@ -3,7 +3,9 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
-from auth.firebase_auth_dev import verify_firebase_token
+from auth.backends import verify_token
+from auth.token_cache import token_cache
+from utils.tracing import span
 
 security = HTTPBearer()
 
@@ -18,8 +20,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Verify Firebase ID token and get user info
-    user_info = await verify_firebase_token(credentials.credentials)
+    # Verify Firebase ID token and get user info; repeat tokens skip verification
+    with span("auth.verify_token"):
+        user_info = token_cache.get(credentials.credentials)
+        if user_info is None:
+            user_info = await verify_token(credentials.credentials)
+            token_cache.put(credentials.credentials, user_info)
     
     # Check if email is verified (disabled for development)
     # Uncomment the lines below if you want to require email verification
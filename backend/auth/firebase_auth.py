@@ -3,16 +3,43 @@
 import firebase_admin
 from firebase_admin import credentials, auth
 from fastapi import HTTPException, status
+import asyncio
+import functools
+import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from google.auth import exceptions as google_exceptions
+from google.auth import jwt as google_jwt
 import json
+from auth.public_keys import key_store
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Firebase Admin calls are synchronous (HTTP key fetches, RSA verification);
+# run them on a dedicated bounded pool so they never block the event loop.
+AUTH_EXECUTOR_WORKERS = int(os.getenv("AUTH_EXECUTOR_WORKERS", "4"))
+AUTH_MAX_CONCURRENCY = int(os.getenv("AUTH_MAX_CONCURRENCY", "32"))
+TOKEN_CLOCK_SKEW_SECONDS = int(os.getenv("FIREBASE_TOKEN_CLOCK_SKEW_SECONDS", "0"))
+
+# Created by startup() (or on first use) and dropped by shutdown(), so a
+# restarted lifespan in the same process gets a working pool
+_executor = None
+_concurrency = asyncio.Semaphore(AUTH_MAX_CONCURRENCY)
+
+_init_lock = threading.Lock()
+
 # Initialize Firebase Admin SDK
 def initialize_firebase():
-    """Initialize Firebase Admin SDK"""
-    if not firebase_admin._apps:
+    """Initialize Firebase Admin SDK (idempotent; runs on first use or at startup)"""
+    if firebase_admin._apps:
+        return
+    with _init_lock:
+        if firebase_admin._apps:
+            return
         # Try to get service account from environment variable
         service_account_key = os.getenv("FIREBASE_SERVICE_ACCOUNT_KEY")
         
@@ -34,8 +61,83 @@ def initialize_firebase():
         
         firebase_admin.initialize_app(cred)
 
-# Initialize Firebase on module import
-initialize_firebase()
+def _start_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=AUTH_EXECUTOR_WORKERS, thread_name_prefix="firebase-auth")
+    return _executor
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call on the auth thread pool, capped at AUTH_MAX_CONCURRENCY in flight"""
+    async with _concurrency:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_start_executor(), functools.partial(fn, *args, **kwargs))
+
+def get_project_id():
+    project_id = os.getenv("FIREBASE_PROJECT_ID")
+    if project_id:
+        return project_id
+    initialize_firebase()
+    return firebase_admin.get_app().project_id
+
+def _decode_with_prefetched_keys(id_token: str, project_id: str) -> dict:
+    """Same checks as auth.verify_id_token, against the keys held by key_store"""
+    decoded_token = google_jwt.decode(
+        id_token,
+        certs=key_store.certs,
+        audience=project_id,
+        clock_skew_in_seconds=TOKEN_CLOCK_SKEW_SECONDS,
+    )
+    if decoded_token.get("iss") != f"https://securetoken.google.com/{project_id}":
+        raise google_exceptions.InvalidValue("Token has incorrect issuer")
+    subject = decoded_token.get("sub")
+    if not isinstance(subject, str) or not subject or len(subject) > 128:
+        raise google_exceptions.InvalidValue("Token has invalid subject")
+    decoded_token["uid"] = subject
+    return decoded_token
+
+async def decode_id_token(id_token: str) -> dict:
+    """
+    Verify an ID token off the event loop. Signing keys come from key_store,
+    which is refreshed in the background; without a project id we fall back
+    to the Admin SDK verifier (still on the thread pool).
+    """
+    if not firebase_admin._apps:
+        # First use: credential loading can touch disk or the metadata server
+        await run_blocking(initialize_firebase)
+    project_id = get_project_id()
+    if not project_id:
+        return await run_blocking(auth.verify_id_token, id_token)
+
+    key_store.start(run_blocking)
+    if not key_store.fresh:
+        await key_store.refresh(run_blocking)
+    return await run_blocking(_decode_with_prefetched_keys, id_token, project_id)
+
+async def start_key_refresh():
+    """Prefetch signing keys and keep them fresh; call from the app lifespan"""
+    key_store.start(run_blocking)
+    await key_store.refresh(run_blocking)
+
+async def startup():
+    """Auth backend hook: load credentials and prefetch signing keys before serving"""
+    global _concurrency
+    # The semaphore binds to the event loop it first waits on; a new lifespan may run on a new loop
+    _concurrency = asyncio.Semaphore(AUTH_MAX_CONCURRENCY)
+    _start_executor()
+    await run_blocking(initialize_firebase)
+    try:
+        await start_key_refresh()
+    except Exception as e:
+        # The background refresher keeps retrying; requests fetch on demand
+        logger.warning("Could not prefetch ID token signing keys: %s", e)
+
+async def shutdown():
+    global _executor
+    await key_store.stop()
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
 
 async def verify_firebase_token(id_token: str) -> dict:
     """
@@ -43,7 +145,7 @@ async def verify_firebase_token(id_token: str) -> dict:
     """
     try:
         # Verify the ID token
-        decoded_token = auth.verify_id_token(id_token)
+        decoded_token = await decode_id_token(id_token)
         
         # Extract user information
         user_info = {
@@ -69,6 +171,13 @@ async def verify_firebase_token(id_token: str) -> dict:
             detail="Firebase ID token has expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    except (google_exceptions.GoogleAuthError, ValueError) as e:
+        expired = "expired" in str(e).lower()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Firebase ID token has expired" if expired else "Invalid Firebase ID token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -81,7 +190,8 @@ async def get_firebase_user(uid: str) -> dict:
     Get Firebase user information by UID
     """
     try:
-        user_record = auth.get_user(uid)
+        await run_blocking(initialize_firebase)
+        user_record = await run_blocking(auth.get_user, uid)
         return {
             "uid": user_record.uid,
             "email": user_record.email,
@@ -0,0 +1,102 @@
+# auth/public_keys.py
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import urllib.request
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Google's published x509 certificates for Firebase ID tokens
+FIREBASE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class PublicKeyStore:
+    """
+    Holds the signing certificates used to verify ID tokens.
+
+    Keys are fetched once up front and then refreshed in a background task
+    shortly before the Cache-Control max-age runs out, so requests never pay
+    for key retrieval. The URL is configurable (FIREBASE_CERTS_URL) so tests
+    can point it at a local stand-in server.
+    """
+
+    def __init__(
+        self,
+        url: str = FIREBASE_CERTS_URL,
+        refresh_margin: float = 300,
+        min_refresh_interval: float = 60,
+        timeout: float = 10,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.url = url
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.clock = clock
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def certs(self) -> Dict[str, str]:
+        return self._certs
+
+    @property
+    def fresh(self) -> bool:
+        return bool(self._certs) and self.clock() < self._expires_at
+
+    def fetch(self) -> Dict[str, str]:
+        """Blocking fetch; call through an executor"""
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+            certs = json.loads(response.read())
+            match = MAX_AGE_RE.search(response.headers.get("Cache-Control", ""))
+        max_age = int(match.group(1)) if match else 3600
+        self._certs = certs
+        self._expires_at = self.clock() + max_age
+        return certs
+
+    async def refresh(self, run_blocking, force: bool = False) -> Dict[str, str]:
+        """Fetch keys via `run_blocking`; without force, only if they have expired"""
+        async with self._lock:
+            if force or not self.fresh:
+                await run_blocking(self.fetch)
+        return self._certs
+
+    def start(self, run_blocking):
+        """Start the background refresher (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop(run_blocking))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self, run_blocking):
+        # The first pass may find keys a request has just fetched
+        force = False
+        while True:
+            try:
+                await self.refresh(run_blocking, force=force)
+            except Exception as e:
+                logger.warning("Failed to refresh ID token signing keys from %s: %s", self.url, e)
+                await asyncio.sleep(self.min_refresh_interval)
+                continue
+            force = True
+            delay = self._expires_at - self.clock() - self.refresh_margin
+            await asyncio.sleep(max(delay, self.min_refresh_interval))
+
+
+key_store = PublicKeyStore(url=os.getenv("FIREBASE_CERTS_URL", FIREBASE_CERTS_URL))
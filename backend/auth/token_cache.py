@@ -0,0 +1,93 @@
+# auth/token_cache.py
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified ID tokens.
+
+    Entries are keyed by a SHA-256 digest of the raw token (the token itself is
+    never kept) and expire at the token's `exp` claim, so a cached token is
+    never accepted for longer than the verifier would have accepted it.
+    """
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self.digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user_info = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return user_info
+
+    def put(self, token: str, user_info: dict):
+        """Cache a verified token until its exp claim; tokens without exp are not cached"""
+        if self.max_entries <= 0:
+            return
+        try:
+            expires_at = float((user_info.get("firebase_claims") or {})["exp"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if expires_at <= self.clock():
+            return
+
+        key = self.digest(token)
+        self._entries[key] = (expires_at, user_info)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, token: str) -> bool:
+        """Drop a single token, e.g. after sign-out or revocation"""
+        return self._entries.pop(self.digest(token), None) is not None
+
+    def invalidate_user(self, uid: str) -> int:
+        """Drop every cached token belonging to a user"""
+        keys = [key for key, (_, info) in self._entries.items() if info.get("uid") == uid]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Set AUTH_TOKEN_CACHE_SIZE=0 to disable caching
+token_cache = TokenCache(max_entries=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024")))
@@ -0,0 +1,256 @@
+# benchmarks/bench_endpoints.py
+#
+# Load benchmark for the read endpoints the frontend hits on every
+# navigation. Boots main.app in-process (lifespan included), seeds a
+# dedicated database and drives each endpoint at a fixed concurrency through
+# httpx's ASGI transport, so the numbers cover routing, auth, Mongo and
+# serialization but no network hop to the API.
+#
+#   # in-memory Motor stand-in (needs mongomock-motor), small volumes
+#   python -m benchmarks.bench_endpoints --memory --users 50 --problems-per-user 200
+#
+#   # local mongod; the bench database is dropped and reseeded
+#   python -m benchmarks.bench_endpoints --mongo-uri mongodb://localhost:27017 \
+#       --users 10000 --problems-per-user 2000 --concurrency 32 --output bench.json
+#
+# Per endpoint the report has p50/p95/p99/mean latency, throughput and DB
+# round trips per request (commands seen by a pymongo CommandListener, or
+# collection calls on the in-memory stand-in). Compare JSON files between
+# commits to spot regressions.
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+ENDPOINTS = {
+    "problems": "/api/problems/",
+    "dashboard": "/api/analytics/dashboard",
+    "spaced_repetition": "/api/analytics/spaced-repetition",
+}
+
+# Commands that are driver housekeeping rather than work done for a request
+IGNORED_COMMANDS = {"endSessions", "ping", "hello", "isMaster", "ismaster"}
+
+
+class RoundTrips:
+    """Counts database round trips; reset between endpoints"""
+
+    def __init__(self):
+        self.count = 0
+
+    # pymongo CommandListener interface
+    def started(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+round_trips = RoundTrips()
+
+
+def use_mongod(uri: str, db_name: str):
+    """Point db.mongo at a real server; must run before anything imports it"""
+    from pymongo import monitoring
+
+    class Listener(monitoring.CommandListener):
+        started = round_trips.started
+        succeeded = round_trips.succeeded
+        failed = round_trips.failed
+
+    monitoring.register(Listener())
+    os.environ["MONGO_URI"] = uri
+    os.environ["MONGO_DB_NAME"] = db_name
+
+
+def use_memory(db_name: str):
+    """Swap db.mongo's client for mongomock-motor and count collection calls"""
+    try:
+        import mongomock_motor
+    except ImportError:
+        raise SystemExit("--memory needs mongomock-motor (pip install mongomock-motor)")
+
+    collection_class = type(mongomock_motor.AsyncMongoMockClient()["x"]["x"]).__mro__[1]
+    for name in ["find", "aggregate", "find_one", "insert_one", "insert_many", "update_one",
+                 "update_many", "replace_one", "bulk_write", "count_documents", "delete_one",
+                 "find_one_and_update", "find_one_and_delete"]:
+        method = getattr(collection_class, name)
+
+        def counted(self, *args, _method=method, **kwargs):
+            round_trips.count += 1
+            return _method(self, *args, **kwargs)
+
+        setattr(collection_class, name, counted)
+
+    os.environ["MONGO_DB_NAME"] = db_name
+    import db.mongo as mongo
+    # Collections resolve db.mongo.client on use, so the stand-in serves every module
+    mongo.client = mongomock_motor.AsyncMongoMockClient()
+
+
+def dev_token(uid: str) -> str:
+    """Unsigned token accepted by AUTH_BACKEND=dev"""
+    payload = {"user_id": uid, "email": f"{uid}@bench.local", "email_verified": True,
+               "exp": int(time.time()) + 86400}
+    body = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+    return f"bench.{body}.bench"
+
+
+async def seed(users: List[str], problems_per_user: int, seed_value: int):
+    """Exactly problems_per_user problems per user, generated by seed_data.py"""
+    import seed_data
+
+    # Summaries are built up front so the first dashboard per user is not
+    # measured as a rebuild
+    await seed_data.seed(users, problems_per_user, seed_value=seed_value, sigma=0, max_problems=problems_per_user)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def drive(client, path: str, users: List[str], requests: int, concurrency: int, seed_value: int) -> Dict:
+    rng = random.Random(seed_value)
+    plan = [rng.choice(users) for _ in range(requests)]
+    headers = {uid: {"Authorization": f"Bearer {dev_token(uid)}"} for uid in set(plan)}
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    position = 0
+
+    async def worker():
+        nonlocal position
+        while position < len(plan):
+            uid = plan[position]
+            position += 1
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers[uid])
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    round_trips.count = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [1000 * value for value in latencies]
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "db_round_trips_per_request": round(round_trips.count / len(latencies), 2) if latencies else 0.0,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+async def run(args) -> Dict:
+    import httpx
+    from main import app
+    import db.mongo as mongo
+    from utils.query_cache import query_cache
+
+    users = [f"bench-user-{i}" for i in range(args.users)]
+    async with app.router.lifespan_context(app):
+        if not args.skip_seed:
+            await mongo.get_client().drop_database(mongo.db.name)
+            started = time.perf_counter()
+            await seed(users, args.problems_per_user, args.seed)
+            print(f"seeded {args.users} users x {args.problems_per_user} problems in "
+                  f"{time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            results = {}
+            for name in args.endpoints:
+                path = ENDPOINTS[name]
+                if args.warmup:
+                    await drive(http, path, users, args.warmup, args.concurrency, args.seed + 1)
+                results[name] = await drive(http, path, users, args.requests, args.concurrency, args.seed)
+                print(f"{name:>18}: p50 {results[name]['p50_ms']:.1f} ms  p95 {results[name]['p95_ms']:.1f} ms  "
+                      f"p99 {results[name]['p99_ms']:.1f} ms  {results[name]['throughput_rps']:.0f} req/s  "
+                      f"{results[name]['db_round_trips_per_request']} round trips/req", file=sys.stderr)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "backend": "memory" if args.memory else "mongod",
+        "users": args.users,
+        "problems_per_user": args.problems_per_user,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "query_cache": query_cache.stats(),
+        "endpoints": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-benchmark the main read endpoints")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--mongo-uri", help="Local mongod to seed and query")
+    target.add_argument("--memory", action="store_true", help="Use the in-memory mongomock-motor stand-in")
+    parser.add_argument("--db-name", default="leetspace_bench", help="Database to (re)create; never point at real data")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--problems-per-user", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per endpoint first")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the data already in --db-name")
+    parser.add_argument("--no-query-cache", action="store_true", help="Measure get_problems without the result cache")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    if args.db_name == "leetspace" and not args.skip_seed:
+        raise SystemExit("Refusing to drop the leetspace database; pick another --db-name")
+
+    # Everything below must be configured before main (and db.mongo) is imported
+    os.environ["AUTH_BACKEND"] = "dev"
+    os.environ["AUTH_INIT_ON_STARTUP"] = "false"
+    if args.no_query_cache:
+        os.environ["QUERY_CACHE_SIZE"] = "0"
+    if args.memory:
+        use_memory(args.db_name)
+    else:
+        use_mongod(args.mongo_uri, args.db_name)
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/bench_serialization.py
+#
+# Compares the two ways GET /api/problems can turn Mongo documents into a
+# response body:
+#
+#   validated: ProblemInDB(**doc) per document, then FastAPI's response_model
+#              handling (dump, re-validate, serialize) and JSONResponse
+#   trusted:   serialize_problem(doc) and FastJSONResponse (orjson)
+#
+#   python -m benchmarks.bench_serialization --problems 10000 --repeat 5
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from typing import List
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from schemas.problem import ProblemInDB
+from utils.responses import FastJSONResponse, serialize_problem
+
+TAGS = ["Array", "Hashmap", "Two Pointers", "Sliding Window", "Binary Search", "DFS",
+        "BFS", "Stack", "Graph", "Greedy", "Sorting", "DP"]
+
+
+def make_documents(count: int, code_size: int, seed: int = 7) -> List[dict]:
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        reviewed = rng.random() < 0.5
+        docs.append({
+            "_id": ObjectId(),
+            "user_id": "bench-user",
+            "title": f"Problem {i}",
+            "url": f"https://leetcode.com/problems/problem-{i}/",
+            "difficulty": rng.choice(["Easy", "Medium", "Hard"]),
+            "tags": rng.sample(TAGS, k=rng.randint(1, 4)),
+            "date_solved": (date(2025, 1, 1) + timedelta(days=rng.randint(0, 365))).isoformat(),
+            "notes": "Used a hashmap for lookups. " * rng.randint(1, 20),
+            "solutions": [{"language": "python", "code": "x = 1\n" * (code_size // 6)}],
+            "retry_later": rng.choice(["Yes", "No"]),
+            "review_count": rng.randint(0, 5),
+            "spaced_repetition": {
+                "repetitions": 2, "interval": 6, "easiness": 2.5,
+                "next_review": "2025-07-01T00:00:00.000Z",
+                "last_reviewed": "2025-06-25T00:00:00.000Z",
+                "review_history": [
+                    {"date": "2025-06-25T00:00:00.000Z", "quality": 4, "interval": 6}
+                ] * rng.randint(1, 10),
+            } if reviewed else None,
+            "search_tokens": ["problem", str(i)],
+        })
+    return docs
+
+
+_adapter = TypeAdapter(List[ProblemInDB])
+
+
+def validated_path(docs: List[dict]) -> bytes:
+    models = []
+    for doc in docs:
+        doc = dict(doc)
+        doc["id"] = str(doc.pop("_id"))
+        models.append(ProblemInDB(**doc))
+    # What FastAPI does with a response_model: dump, validate again, serialize
+    content = [m.model_dump() for m in models]
+    content = _adapter.dump_python(_adapter.validate_python(content), mode="json")
+    return JSONResponse(content).body
+
+
+def trusted_path(docs: List[dict]) -> bytes:
+    return FastJSONResponse([serialize_problem(dict(doc)) for doc in docs]).body
+
+
+def measure(fn, docs, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(docs)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare problem list serialization paths")
+    parser.add_argument("--problems", type=int, default=10000)
+    parser.add_argument("--code-size", type=int, default=2000, help="Bytes of solution code per problem")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    docs = make_documents(args.problems, args.code_size)
+
+    # Both paths must produce the same JSON document
+    if json.loads(validated_path(docs)) != json.loads(trusted_path(docs)):
+        raise SystemExit("validated and trusted outputs differ")
+
+    results = {"problems": args.problems, "code_size": args.code_size, "paths": {}}
+    for name, fn in (("validated", validated_path), ("trusted", trusted_path)):
+        timings = measure(fn, docs, args.repeat)
+        results["paths"][name] = {
+            "best_ms": round(min(timings) * 1000, 2),
+            "median_ms": round(statistics.median(timings) * 1000, 2),
+            "bytes": len(fn(docs)),
+        }
+        print(f"{name:>10}: best {results['paths'][name]['best_ms']:>9.2f} ms  "
+              f"median {results['paths'][name]['median_ms']:>9.2f} ms")
+
+    speedup = results["paths"]["validated"]["median_ms"] / results["paths"]["trusted"]["median_ms"]
+    results["speedup"] = round(speedup, 2)
+    print(f"   speedup: {speedup:.1f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# benchmarks/check_firebase_keys.py
+#
+# Verification check for the Firebase backend's key-store path, run against a
+# local stand-in for Google's certificate endpoint (FIREBASE_CERTS_URL). It
+# generates RSA keys and self-signed certificates, serves them over HTTP with
+# a Cache-Control max-age, signs ID tokens locally and drives
+# auth.firebase_auth.verify_firebase_token:
+#
+#   python -m benchmarks.check_firebase_keys
+#
+# Covered: valid tokens pass; wrong audience, wrong issuer, empty subject,
+# expired, bad signature and unknown key id are rejected with 401; keys are
+# fetched once while fresh and refetched after max-age, picking up a rotated
+# key. Exits non-zero if any check fails. No network access or Firebase
+# project is needed.
+
+import asyncio
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+PROJECT_ID = "leetspace-keys-check"
+MAX_AGE = 3600
+
+
+def make_key(kid: str) -> Tuple[str, str, str]:
+    """(kid, private key PEM, self-signed certificate PEM)"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, kid)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    return kid, private_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class CertServer:
+    """Serves {kid: certificate} like Google's x509 endpoint and counts fetches"""
+
+    def __init__(self):
+        self.certs: Dict[str, str] = {}
+        self.fetches = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.fetches += 1
+                body = json.dumps(server.certs).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={MAX_AGE}, must-revalidate")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/certs"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+def sign(key: Tuple[str, str, str], **overrides) -> str:
+    from google.auth import crypt, jwt
+
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "user-1",
+        "iat": now - 10,
+        "exp": now + 3600,
+        "email": "user-1@example.com",
+        "email_verified": True,
+    }
+    claims.update(overrides)
+    kid, private_pem, _ = key
+    return jwt.encode(crypt.RSASigner.from_string(private_pem, key_id=kid), claims).decode()
+
+
+async def run_checks(server: CertServer) -> List[Tuple[str, bool, str]]:
+    import firebase_admin
+    from fastapi import HTTPException
+    from firebase_admin import credentials
+    from google.auth.credentials import AnonymousCredentials
+    import auth.firebase_auth as firebase_auth
+
+    class LocalCredential(credentials.Base):
+        """No service account: tokens are checked against the stand-in keys only"""
+
+        def get_credential(self):
+            return AnonymousCredentials()
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(LocalCredential(), {"projectId": PROJECT_ID})
+
+    clock = {"now": time.time()}
+    firebase_auth.key_store.clock = lambda: clock["now"]
+
+    first, rotated = make_key("key-1"), make_key("key-2")
+    # Same key id as `first`, different key: the signature cannot verify
+    impostor = ("key-1",) + make_key("key-1")[1:]
+    server.certs = {first[0]: first[2]}
+
+    results = []
+
+    async def check(name: str, token: str, expect_uid: str = None, expect_detail: str = None):
+        try:
+            user = await firebase_auth.verify_firebase_token(token)
+            ok = expect_uid is not None and user["uid"] == expect_uid
+            results.append((name, ok, f"accepted as {user['uid']}"))
+        except HTTPException as e:
+            ok = expect_uid is None and e.status_code == 401 and (expect_detail is None or e.detail == expect_detail)
+            results.append((name, ok, f"{e.status_code} {e.detail}"))
+
+    def expect(name: str, condition: bool, detail: str):
+        results.append((name, condition, detail))
+
+    try:
+        await check("valid token", sign(first), expect_uid="user-1")
+        await check("wrong audience", sign(first, aud="another-project"))
+        await check("wrong issuer", sign(first, iss="https://securetoken.google.com/another-project"))
+        await check("empty subject", sign(first, sub=""))
+        await check("expired", sign(first, iat=int(time.time()) - 7200, exp=int(time.time()) - 3600),
+                    expect_detail="Firebase ID token has expired")
+        await check("bad signature", sign(impostor))
+        await check("unknown key id", sign(rotated))
+        expect("keys fetched once while fresh", server.fetches == 1, f"{server.fetches} fetches")
+
+        # Rotate: the next request after max-age refetches and sees the new key
+        server.certs = {first[0]: first[2], rotated[0]: rotated[2]}
+        clock["now"] += MAX_AGE + 1
+        await check("rotated key after refresh", sign(rotated), expect_uid="user-1")
+        expect("keys refetched after max-age", server.fetches == 2, f"{server.fetches} fetches")
+    finally:
+        await firebase_auth.shutdown()
+    return results
+
+
+def main():
+    server = CertServer()
+    # Read when auth.firebase_auth is imported
+    os.environ["FIREBASE_CERTS_URL"] = server.url
+    os.environ["FIREBASE_PROJECT_ID"] = PROJECT_ID
+    try:
+        results = asyncio.run(run_checks(server))
+    finally:
+        server.close()
+
+    failed = 0
+    for name, ok, detail in results:
+        failed += not ok
+        print(f"{'PASS' if ok else 'FAIL'}  {name:<32} {detail}")
+    print(f"{len(results) - failed}/{len(results)} checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/import_profile.py
+#
+# Cold-start report: imports a module (main by default) in a fresh
+# interpreter with `python -X importtime` and lists the slowest imports.
+#
+#   python -m benchmarks.import_profile --top 25
+#   python -m benchmarks.import_profile --sort self --json import_profile.json
+#   AUTH_BACKEND=firebase python -m benchmarks.import_profile
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+
+def profile_imports(module: str) -> Dict:
+    """Import `module` in a subprocess and parse its -X importtime output"""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = 1000 * (time.perf_counter() - started)
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    imports: List[Dict] = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            imports.append({
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+        except ValueError:
+            continue
+
+    top_level = [entry for entry in imports if entry["depth"] == 0]
+    return {
+        "module": module,
+        "wall_ms": round(wall_ms, 1),
+        "import_ms": round(sum(entry["cumulative_ms"] for entry in top_level), 1),
+        "modules": len(imports),
+        "imports": imports,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the slowest imports when loading the app")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", choices=["cumulative", "self"], default="cumulative")
+    parser.add_argument("--json", metavar="PATH", help="Also write the full report as JSON")
+    args = parser.parse_args()
+
+    report = profile_imports(args.module)
+    key = f"{args.sort}_ms"
+    slowest = sorted(report["imports"], key=lambda entry: entry[key], reverse=True)[:args.top]
+
+    print(f"import {report['module']}: {report['import_ms']:.1f} ms in imports, "
+          f"{report['wall_ms']:.1f} ms wall (interpreter start included), {report['modules']} modules")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for entry in slowest:
+        print(f"{entry['cumulative_ms']:>14.1f} {entry['self_ms']:>9.1f}  {entry['module']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# db/indexes.py
+
+import logging
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from db.mongo import db
+
+logger = logging.getLogger(__name__)
+
+# Every index the application relies on, keyed by collection name.
+# Names are explicit so changing a definition shows up as a new index.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "problems": [
+        # Also serve as the conflict checks for add/update (DuplicateKeyError -> 409)
+        IndexModel([("user_id", ASCENDING), ("title", ASCENDING)], name="user_title_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("url", ASCENDING)], name="user_url_unique", unique=True),
+        # Default list order; _id is the keyset pagination tie-breaker
+        IndexModel(
+            [("user_id", ASCENDING), ("date_solved", DESCENDING), ("_id", DESCENDING)],
+            name="user_date_solved_id"
+        ),
+        IndexModel([("user_id", ASCENDING), ("retry_later", ASCENDING)], name="user_retry_later"),
+        # Spaced repetition due queue (range scans on the native next_review_at date)
+        IndexModel([("user_id", ASCENDING), ("next_review_at", ASCENDING)], name="user_next_review_at"),
+        # Ranked search (search_mode=text); queries always carry an equality on user_id.
+        # Notes live in problem_bodies, so their words are matched via search_tokens.
+        # A collection has at most one text index; ensure_indexes replaces the
+        # older (title, notes) user_title_notes_text with this one.
+        IndexModel(
+            [("user_id", ASCENDING), ("title", TEXT), ("search_tokens", TEXT)],
+            name="user_title_tokens_text",
+            weights={"title": 10, "search_tokens": 1}
+        ),
+        # Search-as-you-type (search_mode=prefix) via anchored regexes on tokens
+        IndexModel([("user_id", ASCENDING), ("search_tokens", ASCENDING)], name="user_search_tokens"),
+    ],
+    "problem_bodies": [
+        # Bodies are read by _id; user_id serves per-user cleanup
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "activity_events": [
+        # Covers the heatmap $group: range on date, filter on type, no document fetch
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING), ("type", ASCENDING)], name="user_date_type"),
+        IndexModel([("user_id", ASCENDING), ("type", ASCENDING), ("at", DESCENDING)], name="user_type_at"),
+    ],
+    "reviews": [
+        # Recent reviews and the quality trend: newest-first range scans per user
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING)], name="user_date"),
+        # One problem's history; unique so re-inserting a stored review is a no-op
+        IndexModel(
+            [("user_id", ASCENDING), ("problem_id", ASCENDING), ("date", DESCENDING)],
+            name="user_problem_date_unique",
+            unique=True
+        ),
+    ],
+    "revision_locks": [
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING)], name="user_date_unique", unique=True),
+    ],
+    "user_summaries": [
+        IndexModel([("user_id", ASCENDING)], name="user_unique", unique=True),
+    ],
+    "data_versions": [
+        IndexModel([("user_id", ASCENDING)], name="user_unique", unique=True),
+    ],
+}
+
+
+def is_text_index(key) -> bool:
+    return any(direction == TEXT for _, direction in key)
+
+
+async def replace_text_index(collection_name: str, model: IndexModel):
+    """Drop any other text index on the collection so `model` can be built"""
+    collection = db[collection_name]
+    for name, info in (await collection.index_information()).items():
+        if name != model.document["name"] and is_text_index(info["key"]):
+            logger.warning("Replacing text index %s on %s with %s", name, collection_name, model.document["name"])
+            await collection.drop_index(name)
+
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """
+    Create every registered index. Existing indexes are left untouched, except
+    that an older text index is replaced by the registered one. A unique index
+    that cannot be built (existing documents already violate it) stops
+    startup: the routes rely on it for conflict detection. Other failures are
+    logged and skipped so the API still starts.
+    """
+    created = {}
+    for collection_name, models in INDEXES.items():
+        created[collection_name] = []
+        for model in models:
+            try:
+                if is_text_index(model.document["key"].items()):
+                    await replace_text_index(collection_name, model)
+                name = await db[collection_name].create_indexes([model])
+                created[collection_name].extend(name)
+            except OperationFailure as e:
+                if model.document.get("unique"):
+                    raise RuntimeError(
+                        f"Could not build unique index {model.document['name']} on {collection_name}: {e}. "
+                        "Remove the duplicate documents, then restart."
+                    ) from e
+                logger.warning(
+                    "Could not create index %s on %s: %s",
+                    model.document["name"], collection_name, e
+                )
+    return created
@@ -1,11 +1,191 @@
 # db/mongo.py
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.monitoring import ConnectionPoolListener
 from dotenv import load_dotenv
-import os
+from utils.metrics import command_metrics
+from utils.tracing import trace_command_listener
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 MONGO_URI = os.getenv("MONGO_URI")
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["leetspace"]
-collection = db["problems"]
\ No newline at end of file
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "leetspace")
+
+# Environment variable -> (MongoClient keyword, type). Only variables that are
+# set are passed, so anything not configured keeps the URI / driver default.
+CLIENT_SETTINGS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_MAX_CONNECTING": ("maxConnecting", int),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", int),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+    "MONGO_COMPRESSORS": ("compressors", str),  # e.g. "zstd,snappy,zlib"
+    "MONGO_ZLIB_COMPRESSION_LEVEL": ("zlibCompressionLevel", int),
+    "MONGO_READ_PREFERENCE": ("readPreference", str),  # e.g. "primaryPreferred"
+    "MONGO_APP_NAME": ("appname", str),
+}
+
+
+def client_options() -> Dict[str, Any]:
+    options = {"appname": "leetspace-api"}
+    for env, (option, cast) in CLIENT_SETTINGS.items():
+        value = os.getenv(env)
+        if value not in (None, ""):
+            options[option] = cast(value)
+    return options
+
+
+class PoolStats(ConnectionPoolListener):
+    """
+    Connection pool counters collected from the driver's CMAP events,
+    summed over every server the client talks to.
+    """
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.created = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.created += 1
+        self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.closed += 1
+        self.open -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checkouts += 1
+        self.checked_out += 1
+        wait = getattr(event, "duration", None) or 0.0
+        self.checkout_wait_total += wait
+        self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "open": self.open,
+            "in_use": self.checked_out,
+            "idle": self.open - self.checked_out,
+            "created": self.created,
+            "closed": self.closed,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "checkout_wait_avg_ms": round(1000 * self.checkout_wait_total / self.checkouts, 3) if self.checkouts else 0.0,
+            "checkout_wait_max_ms": round(1000 * self.checkout_wait_max, 3),
+            "pool_clears": self.pool_clears,
+            "max_pool_size": options.get("maxPoolSize", 100),
+        }
+
+
+pool_stats = PoolStats()
+options = client_options()
+
+# Built by connect() (or on first use outside the app) and dropped by close(),
+# so every FastAPI lifespan gets a live client: a closed PyMongo 4 client
+# cannot be reused
+client = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    global client
+    if client is None:
+        client = AsyncIOMotorClient(
+            MONGO_URI, event_listeners=[pool_stats, command_metrics, trace_command_listener], **options
+        )
+    return client
+
+
+class Collection:
+    """
+    Collection handle safe to keep in a module global: it resolves the
+    current client's collection on every use, so it survives close() and a
+    later connect().
+    """
+
+    def __init__(self, database: "Database", name: str):
+        self._database = database
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._database.current()[self.name], attr)
+
+
+class Database:
+    """Database handle resolved at call time; db["name"] gives a Collection"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def current(self):
+        return get_client()[self.name]
+
+    def __getitem__(self, name: str) -> Collection:
+        return Collection(self, name)
+
+    def __getattr__(self, attr):
+        return getattr(self.current(), attr)
+
+
+db = Database(MONGO_DB_NAME)
+collection = db["problems"]
+
+
+async def connect():
+    """
+    Build the client and warm up the pool before serving traffic: wait for
+    server selection and open MONGO_WARMUP_CONNECTIONS connections (default:
+    the min pool size, at least one) with concurrent pings, so the first
+    requests after a deploy do not pay for TCP/TLS handshakes and authentication.
+    """
+    warmup = int(os.getenv("MONGO_WARMUP_CONNECTIONS", str(max(options.get("minPoolSize", 1), 1))))
+    started = time.perf_counter()
+    mongo_client = get_client()
+    await asyncio.gather(*(mongo_client.admin.command("ping") for _ in range(max(warmup, 1))))
+    logger.info("MongoDB ready in %.1f ms (%d warm-up pings)", 1000 * (time.perf_counter() - started), warmup)
+
+
+def close():
+    """Close the client; the next connect() (or database use) builds a new one"""
+    global client
+    if client is not None:
+        client.close()
+        client = None
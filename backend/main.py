@@ -1,13 +1,47 @@
 # main.py
 
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
-from db.mongo import db
+from fastapi.responses import PlainTextResponse
+import db.mongo as mongo
+from db.indexes import ensure_indexes
+from utils.events import event_sink
+from utils.query_cache import query_cache
+from utils.responses import FastJSONResponse
+from utils.metrics import MetricsMiddleware, registry as metrics_registry
+from utils.tracing import TracingMiddleware, slow_log, trace_exporter
+from utils.profiling import ProfilingMiddleware
+from auth.token_cache import token_cache
 from routes import problems, analytics, problems_debug
 from routes import analytics_debug
 from auth.dependencies import get_current_active_user
+from auth import backends as auth_backends
 
-app = FastAPI()
+# Set AUTH_INIT_ON_STARTUP=false to load the auth backend on the first
+# request instead (e.g. serverless deploys where cold start matters most)
+AUTH_INIT_ON_STARTUP = os.getenv("AUTH_INIT_ON_STARTUP", "true").lower() not in ("0", "false", "no")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open and warm the connection pool, then make sure every index the
+    # routes rely on exists before serving traffic
+    await mongo.connect()
+    await ensure_indexes()
+    if AUTH_INIT_ON_STARTUP:
+        await auth_backends.startup()
+    event_sink.start()
+    yield
+    # Write out any activity events still buffered, then release connections
+    await event_sink.stop()
+    await auth_backends.shutdown()
+    mongo.close()
+    for exporter in (slow_log, trace_exporter):
+        if exporter is not None:
+            exporter.close()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # CORS setup for frontend
 app.add_middleware(
@@ -16,7 +50,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursor for GET /api/problems, data version, tracing
+    expose_headers=["X-Next-Cursor", "ETag", "X-Request-ID", "Server-Timing"],
 )
+# Admin-only request profiling (PROFILING_ENABLED / PROFILING_TOKEN); inside
+# tracing so stored profiles are named after the request ID
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(TracingMiddleware)
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(problems.router, prefix="/api/problems", tags=["Problems"])
@@ -30,7 +72,26 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "auth": "firebase"}
+    return {
+        "status": "healthy",
+        "auth": auth_backends.AUTH_BACKEND,
+        "activity_events": event_sink.metrics(),
+        "query_cache": query_cache.stats(),
+        "mongo_pool": mongo.pool_stats.metrics(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint: route latency, MongoDB commands and component gauges"""
+    return PlainTextResponse(
+        metrics_registry.render({
+            "leetspace_activity_events": event_sink.metrics(),
+            "leetspace_query_cache": query_cache.stats(),
+            "leetspace_token_cache": token_cache.stats(),
+            "leetspace_mongo_pool": mongo.pool_stats.metrics(),
+        }),
+        media_type="text/plain; version=0.0.4",
+    )
 
 @app.get("/test-auth")
 async def test_auth(current_user: dict = Depends(get_current_active_user)):
@@ -0,0 +1,220 @@
+# manage.py
+#
+# Maintenance commands for the LeetSpace backend.
+#
+#   python manage.py rebuild-summaries            # repair every user's dashboard summary
+#   python manage.py rebuild-summaries --user UID # repair a single user
+#   python manage.py ensure-indexes               # create every index in db/indexes.py
+#   python manage.py backfill-search-tokens       # add search_tokens to older problems
+#   python manage.py backfill-review-dates        # store next_review as a native date
+#   python manage.py migrate-review-history       # move embedded histories to reviews
+#   python manage.py split-problem-bodies         # move notes and solutions to problem_bodies
+
+import argparse
+import asyncio
+from db.mongo import db
+from db.indexes import INDEXES, ensure_indexes
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from utils.search import search_tokens
+from utils.due_queue import next_review_field
+from utils.summary import rebuild_user_summary, summaries_collection
+from utils.reviews import review_document, reviews_collection
+from utils.problem_bodies import BODY_FIELDS, bodies_collection, pop_body
+
+collection = db["problems"]
+
+
+async def rebuild_summaries(args):
+    if args.user:
+        user_ids = [args.user]
+    else:
+        # Users with problems plus users whose stale summary should be reset
+        user_ids = set(await collection.distinct("user_id"))
+        user_ids.update(await summaries_collection.distinct("user_id"))
+        user_ids = sorted(uid for uid in user_ids if uid)
+
+    for user_id in user_ids:
+        summary = await rebuild_user_summary(user_id)
+        print(f"Rebuilt summary for {user_id}: {summary['total_problems']} problems")
+    print(f"Rebuilt {len(user_ids)} summaries.")
+
+
+async def create_indexes(args):
+    created = await ensure_indexes()
+    for collection_name, names in created.items():
+        print(f"{collection_name}: {', '.join(names) or 'no indexes created'}")
+
+
+async def backfill_search_tokens(args):
+    query = {} if args.all else {"search_tokens": {"$exists": False}}
+    updated = 0
+    docs = []
+
+    async def flush():
+        nonlocal updated
+        # Notes live in problem_bodies (or are still embedded before the split)
+        notes = {
+            body["_id"]: body.get("notes")
+            async for body in bodies_collection.find({"_id": {"$in": [doc["_id"] for doc in docs]}}, {"notes": 1})
+        }
+        batch = [
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {"search_tokens": search_tokens(doc.get("title"), notes.get(doc["_id"], doc.get("notes")))}}
+            )
+            for doc in docs
+        ]
+        updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+        docs.clear()
+
+    async for doc in collection.find(query, {"title": 1, "notes": 1}):
+        docs.append(doc)
+        if len(docs) >= args.batch_size:
+            await flush()
+    if docs:
+        await flush()
+    print(f"Updated search tokens on {updated} problems.")
+
+
+async def backfill_review_dates(args):
+    query = {"spaced_repetition.next_review": {"$type": "string"}}
+    if not args.all:
+        query["next_review_at"] = {"$exists": False}
+    updated = 0
+    batch = []
+    async for doc in collection.find(query, {"spaced_repetition.next_review": 1}):
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": next_review_field(doc["spaced_repetition"])}))
+        if len(batch) >= args.batch_size:
+            updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+    print(f"Stored next_review_at on {updated} problems.")
+
+
+async def migrate_review_history(args):
+    """
+    Copy spaced_repetition.review_history arrays into the reviews collection,
+    then remove them from the problems. Safe to rerun: the unique
+    (user_id, problem_id, date) index turns already copied reviews into
+    ignored duplicates, and a history is only removed after its batch is in.
+    """
+    await reviews_collection.create_indexes(INDEXES["reviews"])
+
+    copied = 0
+    migrated = 0
+    reviews, problem_ids = [], []
+
+    async def flush():
+        nonlocal copied, migrated
+        if reviews:
+            try:
+                copied += len((await reviews_collection.insert_many(reviews, ordered=False)).inserted_ids)
+            except BulkWriteError as e:
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+                copied += e.details.get("nInserted", 0)
+        if problem_ids and not args.keep:
+            await collection.update_many(
+                {"_id": {"$in": problem_ids}}, {"$unset": {"spaced_repetition.review_history": ""}}
+            )
+        migrated += len(problem_ids)
+        reviews.clear()
+        problem_ids.clear()
+
+    query = {"spaced_repetition.review_history": {"$exists": True}}
+    async for doc in collection.find(query, {"user_id": 1, "spaced_repetition.review_history": 1}):
+        for entry in doc["spaced_repetition"].get("review_history") or []:
+            review = review_document(doc["user_id"], str(doc["_id"]), entry)
+            if review is not None:
+                reviews.append(review)
+        problem_ids.append(doc["_id"])
+        if len(problem_ids) >= args.batch_size:
+            await flush()
+    await flush()
+    action = "Copied" if args.keep else "Moved"
+    print(f"{action} {copied} new reviews from {migrated} problems.")
+
+
+async def split_problem_bodies(args):
+    """
+    Move notes and solutions embedded in problems into problem_bodies (the
+    indexes, including the (title, search_tokens) text index that replaces
+    the (title, notes) one, are ensured first). Safe to rerun: bodies are
+    upserted by problem _id, and the fields are only removed from a batch of
+    problems once its bodies are written.
+    """
+    await ensure_indexes()
+
+    moved = 0
+    batch, problem_ids = [], []
+
+    async def flush():
+        nonlocal moved
+        if batch:
+            await bodies_collection.bulk_write(batch, ordered=False)
+        await collection.update_many(
+            {"_id": {"$in": problem_ids}}, {"$unset": {field: "" for field in BODY_FIELDS}}
+        )
+        moved += len(problem_ids)
+        batch.clear()
+        problem_ids.clear()
+
+    query = {"$or": [{field: {"$exists": True}} for field in BODY_FIELDS]}
+    async for doc in collection.find(query, {"user_id": 1, **{field: 1 for field in BODY_FIELDS}}):
+        body = {field: value for field, value in pop_body(doc).items() if value is not None}
+        if body:
+            batch.append(UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": body, "$setOnInsert": {"user_id": doc["user_id"]}},
+                upsert=True
+            ))
+        problem_ids.append(doc["_id"])
+        if len(problem_ids) >= args.batch_size:
+            await flush()
+    if problem_ids:
+        await flush()
+    print(f"Moved notes and solutions of {moved} problems to problem_bodies.")
+
+
+COMMANDS = {
+    "rebuild-summaries": rebuild_summaries,
+    "ensure-indexes": create_indexes,
+    "backfill-search-tokens": backfill_search_tokens,
+    "backfill-review-dates": backfill_review_dates,
+    "migrate-review-history": migrate_review_history,
+    "split-problem-bodies": split_problem_bodies,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LeetSpace maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild-summaries", help="Recompute user_summaries from problems")
+    rebuild.add_argument("--user", help="Only rebuild this user's summary")
+
+    subparsers.add_parser("ensure-indexes", help="Create the indexes declared in db/indexes.py")
+
+    backfill = subparsers.add_parser("backfill-search-tokens", help="Populate search_tokens for prefix search")
+    backfill.add_argument("--all", action="store_true", help="Recompute tokens on every problem")
+    backfill.add_argument("--batch-size", type=int, default=500)
+
+    review_dates = subparsers.add_parser("backfill-review-dates", help="Populate next_review_at for the due queue")
+    review_dates.add_argument("--all", action="store_true", help="Recompute next_review_at on every problem")
+    review_dates.add_argument("--batch-size", type=int, default=500)
+
+    review_history = subparsers.add_parser("migrate-review-history", help="Move embedded review histories to the reviews collection")
+    review_history.add_argument("--keep", action="store_true", help="Copy without removing the embedded arrays")
+    review_history.add_argument("--batch-size", type=int, default=500)
+
+    bodies = subparsers.add_parser("split-problem-bodies", help="Move notes and solutions to the problem_bodies collection")
+    bodies.add_argument("--batch-size", type=int, default=500)
+
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command](args))
+
+
+if __name__ == "__main__":
+    main()
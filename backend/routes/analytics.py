@@ -1,34 +1,62 @@
 # routes/analytics.py
 
-from fastapi import APIRouter, HTTPException, Depends, Query, Body
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from db.mongo import db
-from datetime import datetime, timedelta
+from bson import ObjectId
+from datetime import date, datetime, timedelta
 from collections import Counter, defaultdict
 from auth.dependencies import get_current_active_user
+from utils.responses import FastJSONResponse
+from utils.due_queue import due_counts, due_problems
+from utils.reviews import recent_reviews, review_stats
+from utils.versions import bump_version, cache_headers, conditional_etag
+from utils.tracing import span, traced
+from utils.summary import (
+    get_user_summary,
+    basic_stats_from_summary,
+    weaknesses_from_summary,
+    solved_date_counts,
+)
 
 router = APIRouter()
 collection = db["problems"]
 events_collection = db["activity_events"]
 locks_collection = db["revision_locks"]
 
+# Fields needed to rank and display revision candidates and recent activity
+REVISION_PROJECTION = {
+    "title": 1, "difficulty": 1, "tags": 1, "date_solved": 1,
+    "review_count": 1, "retry_later": 1,
+}
+
 @router.get("/dashboard")
-async def get_dashboard_stats(current_user: dict = Depends(get_current_active_user)):
+async def get_dashboard_stats(
+    request: Request,
+    heatmap_format: str = Query("days", pattern="^(days|compact)$"),
+    current_user: dict = Depends(get_current_active_user)
+):
     """
-    Get comprehensive dashboard statistics for the authenticated user
+    Get comprehensive dashboard statistics for the authenticated user.
+    heatmap_format=compact returns the activity heatmap as {start, end, counts}.
+
+    The ETag combines the user's data version with today's date (the revision
+    pick, heatmap window and day counts move with the calendar), so an
+    unchanged dashboard is answered with 304 before any collection is read.
     """
     try:
-        # Get all problems for the authenticated user
-        cursor = collection.find({"user_id": current_user["uid"]})
-        problems = []
-        async for doc in cursor:
-            doc["id"] = str(doc["_id"])
-            del doc["_id"]
-            problems.append(doc)
-
-        if not problems:
-            return {
+        _, etag, not_modified = await conditional_etag(
+            request, current_user["uid"], datetime.now().date().isoformat(), heatmap_format
+        )
+        if not_modified:
+            return not_modified
+
+        # Basic stats and weaknesses come from the incrementally maintained summary
+        summary = await get_user_summary(current_user["uid"])
+
+        if summary.get("total_problems", 0) <= 0:
+            return FastJSONResponse({
                 "basic_stats": {
                     "total_problems": 0,
                     "retry_count": 0,
@@ -40,7 +68,7 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_active_us
                 "todays_revision": None,
                 "activity_heatmap": [],
                 "recent_activity": []
-            }
+            }, headers=cache_headers(etag))
 
         # Check server-side lock and pinned problem id (if any)
         today_str = datetime.now().date().isoformat()
@@ -51,17 +79,22 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_active_us
         # Build retry queue (problems with retry_later == "Yes"), sorted by priority
         now = datetime.now()
         retry_queue = []
-        for p in problems:
-            if p.get("retry_later") == "Yes":
-                try:
-                    solved_date = datetime.strptime(str(p.get("date_solved")), "%Y-%m-%d")
-                    days_since = (now - solved_date).days
-                except Exception:
-                    days_since = 0
-                difficulty_bonus = {"Easy": 1, "Medium": 2, "Hard": 3}
-                score = days_since * difficulty_bonus.get(p.get("difficulty"), 1)
-                retry_queue.append({"problem": p, "days_since": days_since, "score": score})
-        retry_queue.sort(key=lambda x: x["score"], reverse=True)
+        with span("analytics.retry_queue"):
+            async for p in collection.find(
+                {"user_id": current_user["uid"], "retry_later": "Yes"},
+                REVISION_PROJECTION
+            ):
+                p["id"] = str(p.pop("_id"))
+                if p.get("retry_later") == "Yes":
+                    try:
+                        solved_date = datetime.strptime(str(p.get("date_solved")), "%Y-%m-%d")
+                        days_since = (now - solved_date).days
+                    except Exception:
+                        days_since = 0
+                    difficulty_bonus = {"Easy": 1, "Medium": 2, "Hard": 3}
+                    score = days_since * difficulty_bonus.get(p.get("difficulty"), 1)
+                    retry_queue.append({"problem": p, "days_since": days_since, "score": score})
+            retry_queue.sort(key=lambda x: x["score"], reverse=True)
 
         # Decide today's revision
         todays_revision = None
@@ -100,14 +133,18 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_active_us
                 else:
                     todays_revision = None
 
-        return {
-            "basic_stats": calculate_basic_stats(problems),
-            "weaknesses": detect_weaknesses(problems),
+        return FastJSONResponse({
+            "basic_stats": basic_stats_from_summary(summary),
+            "weaknesses": weaknesses_from_summary(summary),
             "todays_revision": todays_revision,
             "todays_revision_locked": locked_today,
-            "activity_heatmap": await generate_activity_heatmap(current_user["uid"], problems),
-            "recent_activity": await get_recent_activity(current_user["uid"], problems)
-        }
+            "activity_heatmap": await generate_activity_heatmap(
+                current_user["uid"],
+                solved_counts=solved_date_counts(summary),
+                compact=heatmap_format == "compact",
+            ),
+            "recent_activity": await get_recent_activity(current_user["uid"])
+        }, headers=cache_headers(etag))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -189,96 +226,76 @@ def detect_weaknesses(problems: List[Dict]) -> List[Dict[str, Any]]:
     weaknesses.sort(key=lambda x: x["retry_rate"], reverse=True)
     return weaknesses
 
-def suggest_todays_revision(problems: List[Dict]) -> Dict[str, Any]:
-    """Suggest a problem to revise today using spaced repetition"""
-    
-    today = datetime.now()
-    
-    # First, check for problems that need revision based on spaced repetition
-    spaced_repetition_problems = []
-    for problem in problems:
-        sr_data = problem.get("spaced_repetition")
-        if sr_data and sr_data.get("next_review"):
-            try:
-                next_review = datetime.fromisoformat(sr_data["next_review"])
-                if next_review <= today:
-                    # Calculate priority based on overdue days and difficulty
-                    overdue_days = (today - next_review).days
-                    difficulty_bonus = {"Easy": 1, "Medium": 2, "Hard": 3}
-                    priority_score = overdue_days * difficulty_bonus.get(problem.get("difficulty"), 1)
-                    
-                    spaced_repetition_problems.append({
-                        "problem": problem,
-                        "priority_score": priority_score,
-                        "days_since": 0,  # Will be calculated below
-                        "is_spaced_repetition": True
-                    })
-            except (ValueError, TypeError):
-                continue
-    
-    # If we have spaced repetition problems, return the highest priority one
-    if spaced_repetition_problems:
-        spaced_repetition_problems.sort(key=lambda x: x["priority_score"], reverse=True)
-        best_sr_problem = spaced_repetition_problems[0]
-        
-        # Calculate days since solved for display
-        try:
-            solved_date = datetime.strptime(str(best_sr_problem["problem"]["date_solved"]), "%Y-%m-%d")
-            best_sr_problem["days_since"] = (today - solved_date).days
-        except (ValueError, TypeError):
-            best_sr_problem["days_since"] = 0
-        
+# Due problems ranked for today's suggestion (most overdue first from the index)
+SUGGESTION_CANDIDATES = 20
+
+DIFFICULTY_BONUS = {"Easy": 1, "Medium": 2, "Hard": 3}
+
+def days_since_solved(problem: Dict, today: datetime) -> int:
+    try:
+        return (today - datetime.strptime(str(problem.get("date_solved")), "%Y-%m-%d")).days
+    except (ValueError, TypeError):
+        return 0
+
+async def suggest_todays_revision(user_id: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    Suggest a problem to revise today using spaced repetition.
+    Due problems come from a range scan on (user_id, next_review_at); only
+    problems in the retry queue are read for the fallback ranking.
+    """
+    now = now or datetime.utcnow()
+
+    # First, problems whose spaced repetition review is due, ranked by
+    # overdue days and difficulty
+    due = await due_problems(user_id, now, 0, SUGGESTION_CANDIDATES)
+    if due:
+        best = max(due, key=lambda p: p["overdue_days"] * DIFFICULTY_BONUS.get(p.get("difficulty"), 1))
+        doc = await collection.find_one({"_id": ObjectId(best["id"])}, {"spaced_repetition": 1}) or {}
         return {
-            "id": best_sr_problem["problem"]["id"],
-            "title": best_sr_problem["problem"]["title"],
-            "difficulty": best_sr_problem["problem"]["difficulty"],
-            "tags": best_sr_problem["problem"].get("tags", []),
-            "days_since_solved": best_sr_problem["days_since"],
-            "spaced_repetition": best_sr_problem["problem"].get("spaced_repetition")
+            "id": best["id"],
+            "title": best["title"],
+            "difficulty": best["difficulty"],
+            "tags": best.get("tags", []),
+            "days_since_solved": days_since_solved(best, now),
+            "spaced_repetition": doc.get("spaced_repetition"),
         }
-    
+
     # Fallback to old logic for problems without spaced repetition data
-    retry_problems = [p for p in problems if p.get("retry_later") in ("Yes", True)]
-    
-    if not retry_problems:
-        return None
-    
+    retry_problems = await _fetch_problems(user_id, {"retry_later": {"$in": ["Yes", True]}})
+
     # Calculate priority scores for retry problems
     suggestions = []
     for problem in retry_problems:
         try:
             solved_date = datetime.strptime(str(problem["date_solved"]), "%Y-%m-%d")
-            days_since = (today - solved_date).days
-            
-            # Spaced repetition intervals: 1, 3, 7, 14, 30 days
-            intervals = [1, 3, 7, 14, 30]
-            
-            # Find the interval this problem should be reviewed at
-            priority_score = 0
-            for interval in intervals:
-                if days_since >= interval:
-                    priority_score = days_since - interval + interval  # Overdue bonus
-                
-            # Add difficulty bonus (harder problems need more review)
-            difficulty_bonus = {"Easy": 1, "Medium": 2, "Hard": 3}
-            priority_score *= difficulty_bonus.get(problem.get("difficulty"), 1)
-            
-            suggestions.append({
-                "problem": problem,
-                "priority_score": priority_score,
-                "days_since": days_since
-            })
-            
-        except (ValueError, TypeError):
+        except (KeyError, ValueError, TypeError):
             continue  # Skip problems with invalid dates
-    
+        days_since = (now - solved_date).days
+
+        # Spaced repetition intervals: 1, 3, 7, 14, 30 days
+        intervals = [1, 3, 7, 14, 30]
+
+        # Find the interval this problem should be reviewed at
+        priority_score = 0
+        for interval in intervals:
+            if days_since >= interval:
+                priority_score = days_since  # Overdue bonus
+
+        # Add difficulty bonus (harder problems need more review)
+        priority_score *= DIFFICULTY_BONUS.get(problem.get("difficulty"), 1)
+
+        suggestions.append({
+            "problem": problem,
+            "priority_score": priority_score,
+            "days_since": days_since
+        })
+
     if not suggestions:
         return None
-    
+
     # Return the highest priority problem
-    suggestions.sort(key=lambda x: x["priority_score"], reverse=True)
-    best_suggestion = suggestions[0]
-    
+    best_suggestion = max(suggestions, key=lambda x: x["priority_score"])
+
     return {
         "id": best_suggestion["problem"]["id"],
         "title": best_suggestion["problem"]["title"],
@@ -287,60 +304,91 @@ def suggest_todays_revision(problems: List[Dict]) -> Dict[str, Any]:
         "days_since_solved": best_suggestion["days_since"]
     }
 
-async def generate_activity_heatmap(user_id: str, problems: List[Dict]) -> List[Dict[str, Any]]:
-    """Generate activity heatmap data for the last 365 days"""
+async def count_activity_by_day(user_id: str, start: str) -> Dict[str, int]:
+    """Create/edit events per day since `start`, grouped on the server"""
+    counts = {}
+    async for row in events_collection.aggregate([
+        {"$match": {
+            "user_id": user_id,
+            "date": {"$gte": start},
+            "type": {"$in": ["create", "edit"]},
+        }},
+        {"$group": {"_id": "$date", "count": {"$sum": 1}}},
+    ]):
+        if isinstance(row["_id"], str):
+            counts[row["_id"]] = row["count"]
+    return counts
+
+def compact_heatmap(start: date, end: date, date_counts: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Dense encoding: counts[i] is the activity on start + i days.
+    Intensity levels are min(count, 4), so they are not repeated.
+    """
+    counts = [0] * ((end - start).days + 1)
+    for date_str, count in date_counts.items():
+        try:
+            offset = (date.fromisoformat(date_str) - start).days
+        except ValueError:
+            continue
+        if 0 <= offset < len(counts):
+            counts[offset] += count
+    return {"start": start.isoformat(), "end": end.isoformat(), "counts": counts}
+
+def expand_heatmap(compact: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per-day list format of the compact heatmap"""
+    start = date.fromisoformat(compact["start"])
+    return [
+        {
+            "date": (start + timedelta(days=offset)).isoformat(),
+            "count": count,
+            "level": min(count, 4)  # 0-4 intensity levels for styling
+        }
+        for offset, count in enumerate(compact["counts"])
+    ]
+
+@traced("analytics.generate_activity_heatmap")
+async def generate_activity_heatmap(
+    user_id: str,
+    problems: Optional[List[Dict]] = None,
+    solved_counts: Optional[Dict[str, int]] = None,
+    compact: bool = False,
+):
+    """
+    Generate activity heatmap data for the last 365 days.
+    The solved-date fallback uses solved_counts when given, otherwise problems.
+    Returns the per-day list, or the compact_heatmap encoding when compact=True.
+    """
     
-    today = datetime.now()
+    today = datetime.now().date()
     start_date = today - timedelta(days=365)
+    start_str = start_date.isoformat()
     
     # Count problem creates/edits per date from events
-    date_counts = defaultdict(int)
-    events_found = False
     try:
-        async for ev in events_collection.find({
-            "user_id": user_id,
-            "date": {"$gte": start_date.date().isoformat()}
-        }):
-            if ev.get("type") in ("create", "edit"):
-                d = ev.get("date")
-                if isinstance(d, str):
-                    date_counts[d] += 1
-                    events_found = True
+        date_counts = await count_activity_by_day(user_id, start_str)
     except Exception:
         # Fallback to solved dates if events missing
-        events_found = False
+        date_counts = {}
 
     # If no events were found, fall back to counting by solved dates
-    if not events_found:
-        for problem in problems:
-            try:
-                solved_date = datetime.strptime(str(problem["date_solved"]), "%Y-%m-%d")
-                if solved_date >= start_date:
-                    date_str = solved_date.strftime("%Y-%m-%d")
-                    date_counts[date_str] += 1
-            except (ValueError, TypeError):
-                continue
-    
-    # Generate heatmap data
-    heatmap_data = []
-    current_date = start_date
-    
-    while current_date <= today:
-        date_str = current_date.strftime("%Y-%m-%d")
-        count = date_counts.get(date_str, 0)
-        
-        heatmap_data.append({
-            "date": date_str,
-            "count": count,
-            "level": min(count, 4)  # 0-4 intensity levels for styling
-        })
-        
-        current_date += timedelta(days=1)
-    
-    return heatmap_data
+    if not date_counts and solved_counts is not None:
+        date_counts = {d: count for d, count in solved_counts.items() if d >= start_str}
+    elif not date_counts:
+        date_counts = defaultdict(int)
+        for problem in problems or []:
+            date_str = str(problem.get("date_solved"))
+            if date_str >= start_str:
+                date_counts[date_str] += 1
+
+    heatmap = compact_heatmap(start_date, today, date_counts)
+    return heatmap if compact else expand_heatmap(heatmap)
 
-async def get_recent_activity(user_id: str, problems: List[Dict]) -> List[Dict[str, Any]]:
-    """Get the 5 most recent activity events (create/edit) mapped to problem details"""
+@traced("analytics.get_recent_activity")
+async def get_recent_activity(user_id: str, problems: Optional[List[Dict]] = None) -> List[Dict[str, Any]]:
+    """
+    Get the 5 most recent activity events (create/edit) mapped to problem details.
+    When problems is None only the referenced problems are fetched.
+    """
     try:
         events = []
         async for ev in events_collection.find({
@@ -351,6 +399,11 @@ async def get_recent_activity(user_id: str, problems: List[Dict]) -> List[Dict[s
     except Exception:
         events = []
 
+    fetch_lazily = problems is None
+    if fetch_lazily:
+        event_ids = [ObjectId(ev["problem_id"]) for ev in events if ObjectId.is_valid(ev.get("problem_id"))]
+        problems = await _fetch_problems(user_id, {"_id": {"$in": event_ids}}) if event_ids else []
+
     # Index problems by id for quick lookup
     by_id = {p.get("id"): p for p in problems}
     formatted = []
@@ -382,6 +435,8 @@ async def get_recent_activity(user_id: str, problems: List[Dict]) -> List[Dict[s
 
     # Fallback to problem-solved ordering if no events
     if not formatted:
+        if fetch_lazily:
+            problems = await _fetch_problems(user_id, sort=("date_solved", -1), limit=5)
         try:
             sorted_problems = sorted(
                 problems,
@@ -414,21 +469,58 @@ async def get_recent_activity(user_id: str, problems: List[Dict]) -> List[Dict[s
 
     return formatted
 
+async def _fetch_problems(user_id: str, query: Optional[Dict] = None, sort=None, limit: int = 0) -> List[Dict]:
+    """Fetch a slice of the user's problems with only the display fields"""
+    cursor = collection.find({"user_id": user_id, **(query or {})}, REVISION_PROJECTION)
+    if sort:
+        cursor = cursor.sort(*sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    problems = []
+    async for doc in cursor:
+        doc["id"] = str(doc.pop("_id"))
+        problems.append(doc)
+    return problems
+
+def spaced_repetition_pipeline(user_id: str) -> List[Dict[str, Any]]:
+    """Scheduling totals, computed without shipping problems"""
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$group": {
+            "_id": None,
+            "total_problems": {"$sum": 1},
+            "problems_with_sr": {"$sum": {"$cond": [{"$ifNull": ["$spaced_repetition", False]}, 1, 0]}},
+            "average_easiness": {"$avg": "$spaced_repetition.easiness"},
+        }},
+    ]
+
+@router.get("/heatmap")
+async def get_activity_heatmap(
+    format: str = Query("compact", pattern="^(days|compact)$"),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """Activity heatmap on its own, compact by default"""
+    try:
+        summary = await get_user_summary(current_user["uid"])
+        return await generate_activity_heatmap(
+            current_user["uid"],
+            solved_counts=solved_date_counts(summary),
+            compact=format == "compact",
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/spaced-repetition")
 async def get_spaced_repetition_stats(current_user: dict = Depends(get_current_active_user)):
     """
     Get spaced repetition statistics for the authenticated user
     """
     try:
-        # Get all problems for the authenticated user
-        cursor = collection.find({"user_id": current_user["uid"]})
-        problems = []
-        async for doc in cursor:
-            doc["id"] = str(doc["_id"])
-            del doc["_id"]
-            problems.append(doc)
-
-        if not problems:
+        totals = {}
+        async for doc in collection.aggregate(spaced_repetition_pipeline(current_user["uid"])):
+            totals = doc
+
+        if not totals.get("total_problems"):
             return {
                 "total_problems": 0,
                 "problems_with_sr": 0,
@@ -436,69 +528,51 @@ async def get_spaced_repetition_stats(current_user: dict = Depends(get_current_a
                 "overdue_revisions": 0,
                 "average_easiness": 0,
                 "total_reviews": 0,
+                "average_quality": None,
+                "quality_trend": [],
                 "recent_reviews": []
             }
 
-        # Calculate spaced repetition statistics
-        problems_with_sr = [p for p in problems if p.get("spaced_repetition")]
-        todays_revisions = []
-        overdue_revisions = []
-        total_reviews = 0
-        easiness_scores = []
-        recent_reviews = []
-
-        today = datetime.now()
-        
-        for problem in problems_with_sr:
-            sr_data = problem["spaced_repetition"]
-            
-            # Count total reviews
-            if sr_data.get("review_history"):
-                total_reviews += len(sr_data["review_history"])
-                
-                # Get recent reviews (last 10)
-                for review in sr_data["review_history"][-10:]:
-                    recent_reviews.append({
-                        "problem_id": problem["id"],
-                        "problem_title": problem["title"],
-                        "review_date": review.get("date"),
-                        "quality": review.get("quality"),
-                        "action": review.get("action", "reviewed")
-                    })
-            
-            # Check if due for revision today
-            if sr_data.get("next_review"):
-                try:
-                    next_review = datetime.fromisoformat(sr_data["next_review"])
-                    if next_review <= today:
-                        if next_review.date() == today.date():
-                            todays_revisions.append(problem["id"])
-                        else:
-                            overdue_revisions.append(problem["id"])
-                except (ValueError, TypeError):
-                    continue
-            
-            # Collect easiness scores
-            if sr_data.get("easiness"):
-                easiness_scores.append(sr_data["easiness"])
-
-        # Sort recent reviews by date (most recent first)
-        recent_reviews.sort(key=lambda x: x.get("review_date", ""), reverse=True)
-        recent_reviews = recent_reviews[:10]  # Keep only last 10
+        # Due counts come from an index range scan on next_review_at; review
+        # totals, the quality trend and recent reviews from the reviews collection
+        due = await due_counts(current_user["uid"])
+        reviews = await review_stats(current_user["uid"])
 
+        average_easiness = totals.get("average_easiness")
         return {
-            "total_problems": len(problems),
-            "problems_with_sr": len(problems_with_sr),
-            "todays_revisions": len(todays_revisions),
-            "overdue_revisions": len(overdue_revisions),
-            "average_easiness": round(sum(easiness_scores) / len(easiness_scores), 2) if easiness_scores else 0,
-            "total_reviews": total_reviews,
-            "recent_reviews": recent_reviews
+            "total_problems": totals["total_problems"],
+            "problems_with_sr": totals.get("problems_with_sr", 0),
+            "todays_revisions": due["due_today"],
+            "overdue_revisions": due["overdue"],
+            "average_easiness": round(average_easiness, 2) if average_easiness else 0,
+            "total_reviews": reviews["total_reviews"],
+            "average_quality": reviews["average_quality"],
+            "quality_trend": reviews["quality_trend"],
+            "recent_reviews": await recent_reviews(current_user["uid"])
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/due-queue")
+async def get_due_queue(
+    within_days: int = Query(0, ge=0, le=365),
+    limit: int = Query(20, ge=0, le=200),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Spaced repetition due queue: counts of overdue, due today and upcoming
+    (next `within_days` days) reviews, plus the first `limit` due problems
+    ordered by next review date.
+    """
+    try:
+        now = datetime.utcnow()
+        counts = await due_counts(current_user["uid"], now, within_days)
+        problems = await due_problems(current_user["uid"], now, within_days, limit) if limit else []
+        return {**counts, "within_days": within_days, "problems": problems}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Request body for locking today's revision with the shown problem id
 class LockTodayRequest(BaseModel):
     problem_id: str | None = None
@@ -521,6 +595,7 @@ async def lock_todays_revision(payload: dict | None = Body(None), current_user:
             }},
             upsert=True,
         )
+        await bump_version(current_user["uid"])
         return {"locked": True, "date": today_str}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -534,6 +609,7 @@ async def unlock_todays_revision(current_user: dict = Depends(get_current_active
             {"$set": {"locked": False, "unlocked_at": datetime.utcnow().isoformat()}},
             upsert=True,
         )
+        await bump_version(current_user["uid"])
         return {"locked": False, "date": today_str}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
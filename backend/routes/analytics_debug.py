@@ -43,9 +43,9 @@ async def get_dashboard_stats_debug(
 		return {
 			"basic_stats": calculate_basic_stats(problems),
 			"weaknesses": detect_weaknesses(problems),
-			"todays_revision": suggest_todays_revision(problems),
-			"activity_heatmap": generate_activity_heatmap(problems),
-			"recent_activity": get_recent_activity(problems),
+			"todays_revision": await suggest_todays_revision(user_id),
+			"activity_heatmap": await generate_activity_heatmap(user_id, problems),
+			"recent_activity": await get_recent_activity(user_id, problems),
 		}
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
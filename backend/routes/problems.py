@@ -1,21 +1,105 @@
 # routes/problems.py
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request
 from fastapi.encoders import jsonable_encoder
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from db.mongo import db
-from schemas.problem import ProblemCreate, ProblemInDB, ProblemUpdate
+from schemas.problem import ProblemCreate, ProblemInDB, ProblemUpdate, ReviewRequest
 from auth.dependencies import get_current_active_user
 from bson import ObjectId
+import zlib
 from datetime import datetime
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pydantic import ValidationError
 from collections import Counter
-from fastapi.responses import JSONResponse
+from utils.summary import apply_summary_change, apply_summary_delta, summary_delta
+from utils.events import activity_event, event_sink
+from utils.responses import FastJSONResponse, dumps, serialize_problem
+from utils.spaced_repetition import next_schedule, review_update
+from utils.reviews import (
+    delete_problem_reviews,
+    insert_reviews,
+    problem_reviews,
+    record_review,
+    record_reviews,
+    review_documents,
+)
+from utils.problem_bodies import (
+    BODY_EXCLUSION,
+    BODY_FIELDS,
+    BODY_LOOKUP,
+    body_document,
+    delete_body,
+    get_body,
+    insert_bodies,
+    merge_body,
+    pop_body,
+    update_body,
+)
+from utils.due_queue import next_review_field
+from utils.stats import aggregate_problem_stats, legacy_stats
+from utils.versions import bump_version, cache_headers, conditional_etag
+from utils.query_cache import query_cache
+from utils.search import TEXT_SCORE, search_clauses, search_tokens
+from utils.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    fields_projection,
+    keyset_filter,
+    parse_fields,
+)
 
 
 router = APIRouter()
 
 collection = db["problems"]
-events_collection = db["activity_events"]
+
+async def find_conflicts(user_id: str, fields: dict, exclude_id: Optional[ObjectId] = None) -> List[dict]:
+    """
+    Look up which of the user's problems share a title or URL with `fields`.
+    Only called after a DuplicateKeyError, so the happy path costs no extra query.
+    """
+    clauses = [{key: fields[key]} for key in ("title", "url") if key in fields]
+    if not clauses:
+        return []
+    query = {"user_id": user_id, "$or": clauses}
+    if exclude_id is not None:
+        query["_id"] = {"$ne": exclude_id}
+
+    conflicts = []
+    async for doc in collection.find(query, {"title": 1, "url": 1}):
+        for key in ("title", "url"):
+            if key in fields and doc.get(key) == fields[key]:
+                conflicts.append({"field": key, "id": str(doc["_id"])})
+    conflicts.sort(key=lambda c: c["field"] != "title")
+    return conflicts
+
+def new_problem_document(problem: ProblemCreate, user_id: str) -> dict:
+    """Mongo document for a validated new problem, including index-only fields"""
+    problem_dict = jsonable_encoder(problem)
+    # Override user_id with current authenticated user's Firebase UID
+    problem_dict["user_id"] = user_id
+    problem_dict["search_tokens"] = search_tokens(problem_dict["title"], problem_dict.get("notes"))
+    if problem_dict.get("spaced_repetition"):
+        problem_dict.update(next_review_field(problem_dict["spaced_repetition"]))
+    return problem_dict
+
+def pop_review_history(problem_dict: dict) -> List[dict]:
+    """
+    Take a client-sent review history off a document before it is written;
+    history lives in the reviews collection (see utils/reviews.py)
+    """
+    sr = problem_dict.get("spaced_repetition")
+    return (sr.pop("review_history", None) or []) if sr else []
+
+async def problems_changed(user_id: str):
+    """After any write: advance the data version and drop cached listings"""
+    query_cache.invalidate_user(user_id)
+    await bump_version(user_id)
 
 # POST a problem for a user
 
@@ -24,28 +108,15 @@ async def add_problem(
     problem: ProblemCreate, 
     current_user: dict = Depends(get_current_active_user)
 ):
-    problem_dict = jsonable_encoder(problem)
-    # Override user_id with current authenticated user's Firebase UID
-    problem_dict["user_id"] = current_user["uid"]
-
-    conflicts = []
+    problem_dict = new_problem_document(problem, current_user["uid"])
+    review_history = pop_review_history(problem_dict)
+    body = pop_body(problem_dict)
 
-    # Check for conflicts only within the current user's problems
-    title_conflict = await collection.find_one({
-        "title": problem_dict["title"], 
-        "user_id": current_user["uid"]
-    })
-    if title_conflict:
-        conflicts.append({"field": "title", "id": str(title_conflict["_id"])})
-
-    url_conflict = await collection.find_one({
-        "url": problem_dict["url"], 
-        "user_id": current_user["uid"]
-    })
-    if url_conflict:
-        conflicts.append({"field": "url", "id": str(url_conflict["_id"])})
-
-    if conflicts:
+    # The unique (user_id, title) / (user_id, url) indexes reject conflicts
+    try:
+        result = await collection.insert_one(problem_dict)
+    except DuplicateKeyError:
+        conflicts = await find_conflicts(current_user["uid"], problem_dict)
         return JSONResponse(
             status_code=409,
             content={
@@ -53,34 +124,163 @@ async def add_problem(
                 "conflicts": conflicts
             }
         )
-
-    result = await collection.insert_one(problem_dict)
-    # Log create activity event (non-blocking semantics)
-    try:
-        await events_collection.insert_one({
-            "user_id": current_user["uid"],
-            "problem_id": str(result.inserted_id),
-            "type": "create",
-            "at": datetime.utcnow().isoformat(),
-            "date": datetime.utcnow().date().isoformat(),
-        })
-    except Exception:
-        # Do not block creation on activity log failures
-        pass
-    return ProblemInDB(id=str(result.inserted_id), **problem_dict)
+    await insert_bodies([body_document(result.inserted_id, current_user["uid"], body)])
+    if review_history:
+        await record_reviews(current_user["uid"], str(result.inserted_id), review_history)
+    await apply_summary_change(current_user["uid"], after=problem_dict)
+    await problems_changed(current_user["uid"])
+    # Log create activity event (buffered; never delays the response)
+    event_sink.emit(activity_event(current_user["uid"], str(result.inserted_id), "create"))
+    return ProblemInDB(id=str(result.inserted_id), **problem_dict, **body)
+
+# POST many problems at once
+
+MAX_BULK_PROBLEMS = 1000
+
+@router.post("/bulk")
+async def bulk_add_problems(
+    items: List[Dict[str, Any]] = Body(..., max_length=MAX_BULK_PROBLEMS),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Import up to MAX_BULK_PROBLEMS problems. Each item is validated with
+    ProblemCreate on its own and gets its own result:
+    created (with id), invalid (with errors) or conflict (with conflicts, the
+    same shape as the 409 from POST /). Conflicts with existing problems are
+    found with one $in query and the rest are written with one insert_many.
+    """
+    user_id = current_user["uid"]
+    results: List[Optional[dict]] = [None] * len(items)
+
+    documents = {}  # item index -> document to insert
+    histories = {}  # item index -> review history sent with it
+    bodies = {}  # item index -> notes and solutions, stored in problem_bodies
+    for index, item in enumerate(items):
+        try:
+            problem = ProblemCreate.model_validate(item)
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "status": "invalid",
+                "errors": jsonable_encoder(e.errors(include_url=False, include_context=False)),
+            }
+            continue
+        documents[index] = new_problem_document(problem, user_id)
+        histories[index] = pop_review_history(documents[index])
+        bodies[index] = pop_body(documents[index])
+
+    # Existing problems sharing a title or URL with anything in the batch
+    existing = {"title": {}, "url": {}}
+    if documents:
+        titles = list({doc["title"] for doc in documents.values()})
+        urls = list({doc["url"] for doc in documents.values()})
+        async for doc in collection.find(
+            {"user_id": user_id, "$or": [{"title": {"$in": titles}}, {"url": {"$in": urls}}]},
+            {"title": 1, "url": 1}
+        ):
+            existing["title"].setdefault(doc.get("title"), str(doc["_id"]))
+            existing["url"].setdefault(doc.get("url"), str(doc["_id"]))
+
+    # Earlier items in the batch win over later duplicates of them
+    batch_seen = {"title": {}, "url": {}}
+    to_insert = []
+    for index, doc in documents.items():
+        conflicts = []
+        for field in ("title", "url"):
+            if doc[field] in existing[field]:
+                conflicts.append({"field": field, "id": existing[field][doc[field]]})
+            elif doc[field] in batch_seen[field]:
+                conflicts.append({"field": field, "index": batch_seen[field][doc[field]]})
+        if conflicts:
+            results[index] = {"index": index, "status": "conflict", "conflicts": conflicts}
+            continue
+        batch_seen["title"][doc["title"]] = index
+        batch_seen["url"][doc["url"]] = index
+        to_insert.append((index, doc))
+
+    inserted, inserted_bodies, inserted_reviews = [], [], []
+    if to_insert:
+        failed = {}
+        try:
+            await collection.insert_many([doc for _, doc in to_insert], ordered=False)
+        except BulkWriteError as e:
+            # Concurrent writes can still trip the unique indexes
+            failed = {err["index"]: err for err in e.details.get("writeErrors", [])}
+        for position, (index, doc) in enumerate(to_insert):
+            error = failed.get(position)
+            if error is None:
+                inserted.append(doc)
+                inserted_bodies.append(body_document(doc["_id"], user_id, bodies[index]))
+                inserted_reviews.extend(review_documents(user_id, str(doc["_id"]), histories[index]))
+                results[index] = {"index": index, "status": "created", "id": str(doc["_id"])}
+            elif error.get("code") == 11000:
+                results[index] = {
+                    "index": index,
+                    "status": "conflict",
+                    "conflicts": await find_conflicts(user_id, doc),
+                }
+            else:
+                results[index] = {"index": index, "status": "error", "detail": error.get("errmsg")}
+
+    if inserted:
+        await insert_bodies(inserted_bodies)
+        await insert_reviews(inserted_reviews)
+        delta = Counter()
+        for doc in inserted:
+            delta.update(summary_delta(doc))
+        await apply_summary_delta(user_id, delta)
+        await problems_changed(user_id)
+        for doc in inserted:
+            event_sink.emit(activity_event(user_id, str(doc["_id"]), "create"))
+
+    return {
+        "inserted": len(inserted),
+        "failed": len(items) - len(inserted),
+        "results": results,
+    }
 
 # GET Problems of a user
 
+# Listings carry metadata only; the bodies (still embedded in problems written
+# before the split) stay out of the reply
+LIST_FIELDS = [field for field in ProblemInDB.model_fields if field not in BODY_FIELDS]
+LIST_PROJECTION = {"search_tokens": 0, **BODY_EXCLUSION}
+
 @router.get("/", response_model=List[ProblemInDB])
 async def get_problems(
+    request: Request,
     current_user: dict = Depends(get_current_active_user),
     difficulty: Optional[str] = None,
     tags: Optional[List[str]] = Query(None),
     retry_later: Optional[str] = None,
     search: Optional[str] = None,
+    search_mode: str = "text",
     sort_by: Optional[str] = "date_solved",
     order: Optional[str] = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
 ):
+    """
+    List the user's problems. Without `limit` the whole collection is returned.
+    With `limit`, results are paged by (sort_by, _id); pass the X-Next-Cursor
+    response header back as `cursor` to fetch the next page.
+    `fields=title,tags,...` returns only those fields. Notes and solutions are
+    not part of listings; GET /{id} returns them.
+
+    `search` uses the text index and ranks by relevance (search_mode=text, no
+    cursor paging) or matches word prefixes for search-as-you-type
+    (search_mode=prefix, keeps the requested sort and paging).
+
+    Responses carry an ETag from the user's data version; a matching
+    If-None-Match is answered with 304 without querying problems.
+    """
+    version, etag, not_modified = await conditional_etag(
+        request, current_user["uid"], sorted(request.query_params.multi_items())
+    )
+    if not_modified:
+        return not_modified
+
     # Only get problems for the authenticated user
     query = {"user_id": current_user["uid"]}
 
@@ -90,82 +290,161 @@ async def get_problems(
         query["retry_later"] = retry_later
     if tags:
         query["tags"] = {"$all": tags}
-    if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"notes": {"$regex": search, "$options": "i"}},
-        ]
+    search_filter = search_clauses(search, search_mode) if search else []
+    if search_filter:
+        query["$and"] = search_filter
+    ranked = bool(search) and search_mode == "text"
 
     sort_order = -1 if order == "desc" else 1
-    cursor = collection.find(query).sort(sort_by, sort_order)
-
-    problems = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        del doc["_id"]
-        problems.append(ProblemInDB(**doc))
-
-    return problems
+    if cursor:
+        if ranked:
+            raise HTTPException(
+                status_code=400,
+                detail="Cursor paging is not available for ranked search; use search_mode=prefix"
+            )
+        query.setdefault("$and", []).append(keyset_filter(sort_by, sort_order, decode_cursor(cursor)))
+
+    requested_fields = parse_fields(fields, LIST_FIELDS)
+    projection = fields_projection(requested_fields, sort_by) if requested_fields else LIST_PROJECTION
+
+    # Views differing only in tag order or unused options share an entry
+    cache_params = (
+        difficulty, tuple(sorted(set(tags))) if tags else None, retry_later,
+        search, search_mode if search else None, sort_by, order, limit, cursor,
+        tuple(requested_fields) if requested_fields else None,
+    )
+    cached = query_cache.get(current_user["uid"], cache_params, version)
+    if cached:
+        body, cached_headers = cached
+        return Response(content=body, media_type="application/json", headers={**cache_headers(etag), **cached_headers})
+
+    if ranked:
+        sort = [("score", TEXT_SCORE), ("_id", -1)]
+    else:
+        sort = [(sort_by, sort_order), ("_id", sort_order)]
+    db_cursor = collection.find(query, projection).sort(sort)
+    if limit:
+        # One extra document tells us whether another page exists
+        db_cursor = db_cursor.limit(limit + 1)
+
+    docs = [doc async for doc in db_cursor]
+    next_cursor = None
+    if limit and len(docs) > limit:
+        docs = docs[:limit]
+        if not ranked:
+            next_cursor = encode_cursor(docs[-1], sort_by)
+
+    page_headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+    # Documents were validated when written; skip ProblemInDB re-validation and
+    # response_model serialization and encode the raw values directly
+    if requested_fields:
+        items = []
+        for doc in docs:
+            doc["id"] = str(doc.pop("_id"))
+            items.append({f: doc.get(f) for f in requested_fields})
+    else:
+        items = [serialize_problem(doc) for doc in docs]
+
+    response = FastJSONResponse(content=items, headers={**cache_headers(etag), **page_headers})
+    query_cache.put(current_user["uid"], cache_params, version, response.body, page_headers)
+    return response
 
 # GET stats
 @router.get("/stats")
 async def get_stats(current_user: dict = Depends(get_current_active_user)):
     try:
-        # 1. Get all problems for the authenticated user
-        cursor = collection.find({"user_id": current_user["uid"]})
-        problems = []
-        async for doc in cursor:
-            problems.append(doc)
-
-        if not problems:
-            return {
-                "total_solved": 0,
-                "by_difficulty": {},
-                "most_common_tags": [],
-                "total_time_minutes": 0,
-                "retry_later_count": 0
-            }
-
-        # 2. Count by difficulty
-        difficulty_count = Counter(p["difficulty"] for p in problems)
-
-        # 3. Most common tags
-        tags = []
-        for p in problems:
-            tags.extend(p.get("tags", []))
-        tag_count = Counter(tags).most_common(5)  # top 5
-        most_common_tags = [tag for tag, _ in tag_count]
+        # Counted on the server in one aggregation; documents never leave MongoDB
+        stats = await aggregate_problem_stats(current_user["uid"])
+        return legacy_stats(stats)
 
-        # 4. Total time spent
-        total_time = sum(p.get("time_taken_min", 0) for p in problems)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 5. Retry later count
-        retry_count = sum(1 for p in problems if p.get("retry_later") is True)
+# GET export of the whole library
 
-        return {
-            "total_solved": len(problems),
-            "by_difficulty": difficulty_count,
-            "most_common_tags": most_common_tags,
-            "total_time_minutes": total_time,
-            "retry_later_count": retry_count
-        }
+# Fields kept on problem documents for indexing only
+INTERNAL_FIELDS_PROJECTION = {"search_tokens": 0, "next_review_at": 0}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@router.get("/export")
+async def export_problems(
+    current_user: dict = Depends(get_current_active_user),
+    compress: bool = False,
+    batch_size: int = Query(500, ge=1, le=5000),
+):
+    """
+    Stream every problem (notes and solutions included) as newline-delimited
+    JSON straight from the cursor, one chunk per `batch_size` documents, so
+    memory use does not depend on the size of the library. compress=true
+    returns a .ndjson.gz file instead.
+    """
+    cursor = collection.aggregate([
+        {"$match": {"user_id": current_user["uid"]}},
+        {"$sort": {"_id": 1}},
+        {"$project": INTERNAL_FIELDS_PROJECTION},
+        BODY_LOOKUP,
+    ], batchSize=batch_size)
+
+    async def ndjson_chunks():
+        lines = []
+        async for doc in cursor:
+            lines.append(dumps(serialize_problem(merge_body(doc))) + b"\n")
+            if len(lines) >= batch_size:
+                yield b"".join(lines)
+                lines = []
+        if lines:
+            yield b"".join(lines)
+
+    async def gzip_chunks():
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+        async for chunk in ndjson_chunks():
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    filename = "leetspace-problems.ndjson"
+    if compress:
+        return StreamingResponse(
+            gzip_chunks(),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.gz"'},
+        )
+    return StreamingResponse(
+        ndjson_chunks(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 # GET a problem
 
 @router.get("/{id}", response_model=ProblemInDB)
 async def get_problem(id: str, current_user: dict = Depends(get_current_active_user)):
-    doc = await collection.find_one({
-        "_id": ObjectId(id),
-        "user_id": current_user["uid"]  # Ensure user can only access their own problems
-    })
+    """The full problem: metadata joined with its notes and solutions in one round trip"""
+    doc = None
+    async for doc in collection.aggregate([
+        {"$match": {
+            "_id": ObjectId(id),
+            "user_id": current_user["uid"]  # Ensure user can only access their own problems
+        }},
+        {"$project": INTERNAL_FIELDS_PROJECTION},
+        BODY_LOOKUP,
+    ]):
+        pass
     if not doc:
         raise HTTPException(status_code=404, detail="Problem not found")
-    doc["id"] = str(doc["_id"])
-    del doc["_id"]
-    return ProblemInDB(**doc)
+    return FastJSONResponse(content=serialize_problem(merge_body(doc)))
+
+# GET a problem's review history
+
+@router.get("/{id}/reviews")
+async def get_problem_reviews(
+    id: str,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: dict = Depends(get_current_active_user),
+):
+    """Reviews of one problem, newest first"""
+    return FastJSONResponse(content=await problem_reviews(current_user["uid"], id, limit))
 
 # PUT update a problem
 
@@ -181,6 +460,10 @@ async def update_problem(id: str, update: ProblemUpdate, current_user: dict = De
     if "date_solved" in update_data:
         update_data["date_solved"] = update_data["date_solved"].isoformat()
 
+    # Review entries a client sends back are appended to the reviews
+    # collection (repeats of stored reviews are ignored by its unique index)
+    review_history = pop_review_history(update_data)
+
     # Handle spaced repetition data - convert to proper format for MongoDB
     if "spaced_repetition" in update_data:
         sr_data = update_data["spaced_repetition"]
@@ -198,37 +481,30 @@ async def update_problem(id: str, update: ProblemUpdate, current_user: dict = De
                     pass
                 elif hasattr(sr_data["last_reviewed"], 'isoformat'):
                     sr_data["last_reviewed"] = sr_data["last_reviewed"].isoformat()
-            # Ensure review_history is properly formatted
-            if "review_history" in sr_data:
-                for review in sr_data["review_history"]:
-                    if "date" in review:
-                        if isinstance(review["date"], str):
-                            # Frontend sends Date objects as strings, keep as is
-                            pass
-                        elif hasattr(review["date"], 'isoformat'):
-                            review["date"] = review["date"].isoformat()
 
-    conflicts = []
+        # Mirror next_review as a native date for the due queue
+        update_data.update(next_review_field(sr_data))
 
-    if "title" in update_data:
-        existing_title = await collection.find_one({
-            "title": update_data["title"],
-            "user_id": current_user["uid"],
-            "_id": {"$ne": ObjectId(id)}
-        })
-        if existing_title:
-            conflicts.append({"field": "title", "id": str(existing_title["_id"])})
+    # Keep the prefix-search tokens in step when both inputs are known up front
+    if "title" in update_data and "notes" in update_data:
+        update_data["search_tokens"] = search_tokens(update_data["title"], update_data["notes"])
 
-    if "url" in update_data:
-        existing_url = await collection.find_one({
-            "url": update_data["url"],
-            "user_id": current_user["uid"],
-            "_id": {"$ne": ObjectId(id)}
-        })
-        if existing_url:
-            conflicts.append({"field": "url", "id": str(existing_url["_id"])})
+    # Notes and solutions are written to problem_bodies; copies still embedded
+    # in problems from before the split are dropped as they are replaced
+    body = pop_body(update_data)
+    update = {"$set": update_data} if update_data else {}
+    if body:
+        update["$unset"] = {field: "" for field in body}
 
-    if conflicts:
+    # Fetch the previous version so the summary can be adjusted by the difference
+    owner_filter = {"_id": ObjectId(id), "user_id": current_user["uid"]}
+    try:
+        if update:
+            before = await collection.find_one_and_update(owner_filter, update, return_document=ReturnDocument.BEFORE)
+        else:
+            before = await collection.find_one(owner_filter)
+    except DuplicateKeyError:
+        conflicts = await find_conflicts(current_user["uid"], update_data, exclude_id=ObjectId(id))
         return JSONResponse(
             status_code=409,
             content={
@@ -237,51 +513,91 @@ async def update_problem(id: str, update: ProblemUpdate, current_user: dict = De
             }
         )
 
-    result = await collection.find_one_and_update(
-        {"_id": ObjectId(id), "user_id": current_user["uid"]},
-        {"$set": update_data},
-        return_document=True
-    )
-
-    if not result:
+    if not before:
         raise HTTPException(status_code=404, detail="Problem not found")
 
+    if body:
+        await update_body(before["_id"], current_user["uid"], body)
+    # The response carries the stored body with this update applied
+    stored_body = {} if len(body) == len(BODY_FIELDS) else await get_body(before["_id"])
+    result = merge_body({**before, **update_data}, {**stored_body, **body})
+    if ("title" in update_data or "notes" in body) and "search_tokens" not in update_data:
+        result["search_tokens"] = search_tokens(result.get("title"), result.get("notes"))
+        await collection.update_one({"_id": before["_id"]}, {"$set": {"search_tokens": result["search_tokens"]}})
+    if review_history:
+        await record_reviews(current_user["uid"], id, review_history)
+    await apply_summary_change(current_user["uid"], before=before, after=result)
+    await problems_changed(current_user["uid"])
+
     result["id"] = str(result["_id"])
     del result["_id"]
-    # Log edit activity event (non-blocking semantics)
-    try:
-        await events_collection.insert_one({
-            "user_id": current_user["uid"],
-            "problem_id": id,
-            "type": "edit",
-            "at": datetime.utcnow().isoformat(),
-            "date": datetime.utcnow().date().isoformat(),
-        })
-    except Exception:
-        pass
+    # Log edit activity event (buffered; never delays the response)
+    event_sink.emit(activity_event(current_user["uid"], id, "edit"))
     return ProblemInDB(**result)
 
+# POST a spaced repetition review
+
+# Attempts before giving up when concurrent reviews keep winning the race
+MAX_REVIEW_ATTEMPTS = 5
+
+@router.post("/{id}/review")
+async def review_problem(id: str, review: ReviewRequest, current_user: dict = Depends(get_current_active_user)):
+    """
+    Record a review and reschedule the problem with SM-2 on the server.
+    The update only applies if the schedule is unchanged since it was read
+    (compare-and-set on last_reviewed), so two tabs reviewing at once are
+    applied one after the other instead of overwriting each other.
+    """
+    owner_filter = {"_id": ObjectId(id), "user_id": current_user["uid"]}
+
+    for _ in range(MAX_REVIEW_ATTEMPTS):
+        doc = await collection.find_one(owner_filter, {
+            "spaced_repetition.repetitions": 1,
+            "spaced_repetition.interval": 1,
+            "spaced_repetition.easiness": 1,
+            "spaced_repetition.last_reviewed": 1,
+            "review_count": 1,
+        })
+        if not doc:
+            raise HTTPException(status_code=404, detail="Problem not found")
+
+        sr = doc.get("spaced_repetition")
+        schedule, entry = next_schedule(sr, review.quality, datetime.utcnow())
+        if sr is None:
+            expected = {"spaced_repetition": None}
+        else:
+            expected = {"spaced_repetition.last_reviewed": sr.get("last_reviewed")}
+
+        result = await collection.update_one({**owner_filter, **expected}, review_update(sr, schedule))
+        if result.modified_count:
+            await record_review(current_user["uid"], id, entry)
+            await problems_changed(current_user["uid"])
+            event_sink.emit(activity_event(current_user["uid"], id, "edit"))
+            return {
+                "id": id,
+                "review_count": doc.get("review_count", 0) + 1,
+                "spaced_repetition": schedule,
+                "review": entry,
+            }
+
+    raise HTTPException(status_code=409, detail="Problem was reviewed concurrently, please retry")
+
 # Delete a problem
 @router.delete("/{id}")
 async def delete_problem(id: str, current_user: dict = Depends(get_current_active_user)):
-    # Optionally log delete event (non-blocking)
-    try:
-        await events_collection.insert_one({
-            "user_id": current_user["uid"],
-            "problem_id": id,
-            "type": "delete",
-            "at": datetime.utcnow().isoformat(),
-            "date": datetime.utcnow().date().isoformat(),
-        })
-    except Exception:
-        pass
+    # Log delete event (buffered; never delays the response)
+    event_sink.emit(activity_event(current_user["uid"], id, "delete"))
 
-    result = await collection.delete_one({
+    deleted = await collection.find_one_and_delete({
         "_id": ObjectId(id), 
         "user_id": current_user["uid"]
     })
-    if result.deleted_count == 0:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Problem not found")
+    await apply_summary_change(current_user["uid"], before=deleted)
+    await delete_body(deleted["_id"])
+    await delete_problem_reviews(current_user["uid"], id)
+    await problems_changed(current_user["uid"])
     return {"detail": "Problem deleted successfully"}
 
 
@@ -1,20 +1,28 @@
 # schemas/problem.py
 
 from pydantic import BaseModel, HttpUrl, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional
 from datetime import date, datetime
 
 class Solution(BaseModel):
     language: str
     code: str
 
+class ReviewEntry(BaseModel):
+    date: str = Field(..., description="Review time (ISO string)")
+    quality: Optional[int] = Field(default=None, ge=0, le=5, description="Recall quality (0-5); none for skips")
+    interval: Optional[int] = Field(default=None, description="Interval scheduled by this review")
+    action: str = Field(default="reviewed", description="reviewed or skipped")
+
 class SpacedRepetition(BaseModel):
     repetitions: int = Field(default=0, description="Number of successful reviews")
     interval: int = Field(default=1, description="Days until next review")
     easiness: float = Field(default=2.5, description="Difficulty factor (1.3-3.0)")
     next_review: Optional[str] = Field(default=None, description="Next review date (ISO string)")
     last_reviewed: Optional[str] = Field(default=None, description="Last review date (ISO string)")
-    review_history: List[Dict[str, Any]] = Field(default_factory=list, description="Review history")
+    # Write-only: entries sent here are appended to the reviews collection;
+    # read history from GET /api/problems/{id}/reviews
+    review_history: List[ReviewEntry] = Field(default_factory=list, description="Reviews to record")
 
 class ProblemBase(BaseModel):
     title: str = Field(..., example="Two Sum")
@@ -51,6 +59,10 @@ class ProblemUpdate(BaseModel):
     spaced_repetition: Optional[SpacedRepetition] = None
 
 
+class ReviewRequest(BaseModel):
+    quality: int = Field(..., ge=0, le=5, description="Recall quality (0-5, SM-2 scale)")
+
+
 class ProblemInDB(ProblemBase):
     id: str
     user_id: str
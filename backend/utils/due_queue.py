@@ -0,0 +1,92 @@
+# utils/due_queue.py
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from db.mongo import db
+
+collection = db["problems"]
+
+# Native BSON date mirroring spaced_repetition.next_review (an ISO string kept
+# for API compatibility). Stored as naive UTC, indexed with user_id.
+DUE_FIELD = "next_review_at"
+
+DUE_PROJECTION = {
+    "title": 1, "difficulty": 1, "tags": 1, "date_solved": 1,
+    "review_count": 1, DUE_FIELD: 1,
+}
+
+
+def parse_review_date(value: Any) -> Optional[datetime]:
+    """ISO string or datetime -> naive UTC datetime (None if missing or unparseable)"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        try:
+            moment = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def next_review_field(spaced_repetition: Optional[Dict[str, Any]]) -> Dict[str, Optional[datetime]]:
+    """$set fragment keeping next_review_at in step with a spaced_repetition value"""
+    return {DUE_FIELD: parse_review_date((spaced_repetition or {}).get("next_review"))}
+
+
+def day_start(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def due_counts(user_id: str, now: Optional[datetime] = None, within_days: int = 0) -> Dict[str, int]:
+    """
+    Count overdue reviews (before today), reviews due today (up to now) and,
+    when within_days > 0, reviews coming up in the next within_days days.
+    The $match is a range scan on (user_id, next_review_at), so the work is
+    proportional to the due set rather than the library.
+    """
+    now = now or datetime.utcnow()
+    today = day_start(now)
+    horizon = now + timedelta(days=within_days)
+
+    pipeline = [
+        {"$match": {"user_id": user_id, DUE_FIELD: {"$lte": horizon}}},
+        {"$facet": {
+            "overdue": [{"$match": {DUE_FIELD: {"$lt": today}}}, {"$count": "n"}],
+            "due_today": [{"$match": {DUE_FIELD: {"$gte": today, "$lte": now}}}, {"$count": "n"}],
+            "upcoming": [{"$match": {DUE_FIELD: {"$gt": now}}}, {"$count": "n"}],
+        }},
+    ]
+    result = {}
+    async for doc in collection.aggregate(pipeline):
+        result = doc
+
+    def count(name):
+        return (result.get(name) or [{}])[0].get("n", 0)
+
+    return {
+        "overdue": count("overdue"),
+        "due_today": count("due_today"),
+        "upcoming": count("upcoming"),
+    }
+
+
+async def due_problems(user_id: str, now: Optional[datetime] = None, within_days: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+    """Problems due up to now + within_days, most overdue first"""
+    now = now or datetime.utcnow()
+    cursor = collection.find(
+        {"user_id": user_id, DUE_FIELD: {"$lte": now + timedelta(days=within_days)}},
+        DUE_PROJECTION,
+    ).sort(DUE_FIELD, 1).limit(limit)
+
+    problems = []
+    async for doc in cursor:
+        doc["id"] = str(doc.pop("_id"))
+        due_at = doc.pop(DUE_FIELD)
+        doc["next_review"] = due_at.isoformat(timespec="milliseconds") + "Z"
+        doc["overdue_days"] = max((day_start(now) - day_start(due_at)).days, 0)
+        problems.append(doc)
+    return problems
@@ -0,0 +1,138 @@
+# utils/events.py
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pymongo.errors import BulkWriteError
+from db.mongo import db
+from utils.versions import bump_versions
+
+logger = logging.getLogger(__name__)
+
+
+def activity_event(user_id: str, problem_id: str, event_type: str) -> Dict[str, Any]:
+    """Document stored in activity_events for a create/edit/delete"""
+    now = datetime.utcnow()
+    return {
+        "user_id": user_id,
+        "problem_id": problem_id,
+        "type": event_type,
+        "at": now.isoformat(),
+        "date": now.date().isoformat(),
+    }
+
+
+class EventSink:
+    """
+    In-process buffer for activity events.
+
+    Routes call emit() and return immediately; a background task writes the
+    queue with insert_many(ordered=False) whenever max_batch events are waiting
+    or flush_interval seconds have passed, and stop() drains what is left.
+    The activity log is best effort, exactly like the inline inserts it
+    replaces: when the queue is full new events are dropped and counted.
+    Each flush bumps the data version of the users it wrote events for.
+    """
+
+    def __init__(self, collection, max_batch: int = 500, flush_interval: float = 1.0, max_queue: int = 10000):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_at: Optional[float] = None
+
+    def emit(self, event: Dict[str, Any]) -> bool:
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+        self._queue.append(event)
+        self.enqueued += 1
+        self._ensure_started()
+        if len(self._queue) >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _ensure_started(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.start()
+
+    def start(self):
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background writer and flush everything still queued"""
+        self._stopping = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        while self._queue:
+            await self.flush()
+
+    async def flush(self):
+        batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+        if not batch:
+            return
+        try:
+            result = await self.collection.insert_many(batch, ordered=False)
+            self.written += len(result.inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            self.written += inserted
+            self.failed += len(batch) - inserted
+            logger.warning("Dropped %d activity events: %s", len(batch) - inserted, e)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.warning("Dropped %d activity events: %s", len(batch), e)
+        self.batches += 1
+        self.last_flush_at = time.time()
+        # Recent activity reads these events, so cached dashboards must go stale
+        await bump_versions(event["user_id"] for event in batch)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._queue:
+                await self.flush()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self._queue),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_at": self.last_flush_at,
+        }
+
+
+event_sink = EventSink(
+    db["activity_events"],
+    max_batch=int(os.getenv("EVENT_SINK_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("EVENT_SINK_FLUSH_INTERVAL", "1.0")),
+    max_queue=int(os.getenv("EVENT_SINK_MAX_QUEUE", "10000")),
+)
@@ -0,0 +1,247 @@
+# utils/metrics.py
+
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import encode as bson_encode
+from pymongo import monitoring
+
+# Seconds; Prometheus-style upper bounds (+Inf is implicit)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Re-encoding replies to measure their size costs CPU on every command;
+# set METRICS_MONGO_REPLY_BYTES=false to skip it
+MEASURE_REPLY_BYTES = os.getenv("METRICS_MONGO_REPLY_BYTES", "true").lower() not in ("0", "false", "no")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms keyed by metric name and label set, rendered in
+    the Prometheus text exposition format. Updates come from the event loop
+    and from Motor's executor threads (the command listener), so they are
+    serialized with a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+
+    def counter(self, name: str, help_text: str):
+        self._help[name] = ("counter", help_text)
+        self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self._help[name] = ("histogram", help_text)
+        self._histograms.setdefault(name, {})
+        self._buckets[name] = tuple(buckets)
+
+    def inc(self, name: str, labels: Dict[str, str], amount: float = 1):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, labels: Dict[str, str], value: float):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._buckets[name])
+            histogram.observe(value)
+
+    def clear(self):
+        with self._lock:
+            for series in self._counters.values():
+                series.clear()
+            for series in self._histograms.values():
+                series.clear()
+
+    def render(self, gauges: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """
+        Prometheus text format. `gauges` maps a metric prefix to a stats dict
+        (e.g. query_cache.stats()); its numeric values are exported as gauges.
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, series in self._counters.items():
+                lines.append(f"# HELP {name} {self._help[name][1]}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+            for name, series in self._histograms.items():
+                lines.append(f"# HELP {name} {self._help[name][1]}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else format_value(bound)
+                        lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+        for prefix, stats in (gauges or {}).items():
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label_value(str(value))}"' for key, value in labels) + "}"
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+registry.counter("http_requests_total", "HTTP responses by route and status")
+registry.histogram("http_request_duration_seconds", "HTTP request latency by route")
+registry.histogram("http_request_db_round_trips", "MongoDB commands issued per HTTP request", ROUND_TRIP_BUCKETS)
+registry.histogram("http_request_db_seconds", "Time spent in MongoDB commands per HTTP request")
+registry.histogram("http_request_db_reply_bytes", "MongoDB reply bytes per HTTP request", BYTES_BUCKETS)
+registry.counter("mongodb_commands_total", "MongoDB commands by name and outcome")
+registry.histogram("mongodb_command_duration_seconds", "MongoDB command latency by command name")
+registry.counter("mongodb_reply_bytes_total", "Bytes of MongoDB replies by command name")
+
+
+class RequestStats:
+    """Database work attributed to one HTTP request"""
+
+    __slots__ = ("round_trips", "db_seconds", "reply_bytes", "commands", "open", "_lock")
+
+    def __init__(self):
+        self.round_trips = 0
+        self.db_seconds = 0.0
+        self.reply_bytes = 0
+        self.commands: Dict[str, int] = {}
+        self.open = True
+        self._lock = threading.Lock()
+
+    def add(self, command: str, seconds: float, reply_bytes: int):
+        with self._lock:
+            # Tasks spawned during a request inherit its context; once the
+            # response is sent their commands are no longer counted against it
+            if not self.open:
+                return
+            self.round_trips += 1
+            self.db_seconds += seconds
+            self.reply_bytes += reply_bytes
+            self.commands[command] = self.commands.get(command, 0) + 1
+
+
+# Set by the middleware; Motor copies the context into its executor threads,
+# so the command listener sees the stats of the request that issued a command
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("current_request", default=None)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Records every MongoDB command and attributes it to the current request"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, "ok", reply=event.reply)
+
+    def failed(self, event):
+        self._record(event, "error")
+
+    def _record(self, event, outcome: str, reply=None):
+        seconds = event.duration_micros / 1e6
+        reply_bytes = 0
+        if MEASURE_REPLY_BYTES and reply is not None:
+            try:
+                reply_bytes = len(bson_encode(reply))
+            except Exception:
+                reply_bytes = 0
+        name = event.command_name
+        registry.inc("mongodb_commands_total", {"command": name, "outcome": outcome})
+        registry.observe("mongodb_command_duration_seconds", {"command": name}, seconds)
+        if reply_bytes:
+            registry.inc("mongodb_reply_bytes_total", {"command": name}, reply_bytes)
+        stats = current_request.get()
+        if stats is not None:
+            stats.add(name, seconds, reply_bytes)
+
+
+command_metrics = CommandMetrics()
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Route template (/api/problems/{id}) rather than the raw path, to bound label cardinality"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: times each HTTP request until its last body chunk
+    is sent and records latency, status and the request's MongoDB work.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.open = False
+            current_request.reset(token)
+            labels = {"method": scope["method"], "route": route_label(scope)}
+            registry.inc("http_requests_total", {**labels, "status": str(status)})
+            registry.observe("http_request_duration_seconds", labels, elapsed)
+            registry.observe("http_request_db_round_trips", labels, stats.round_trips)
+            registry.observe("http_request_db_seconds", labels, stats.db_seconds)
+            registry.observe("http_request_db_reply_bytes", labels, stats.reply_bytes)
@@ -0,0 +1,71 @@
+# utils/pagination.py
+
+import base64
+from typing import Any, Dict, Iterable, List, Optional
+from bson import ObjectId, json_util
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(doc: Dict[str, Any], sort_by: str) -> str:
+    """Opaque cursor pointing just past `doc` in (sort_by, _id) order"""
+    payload = json_util.dumps({"v": doc.get(sort_by), "id": doc["_id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json_util.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(data.get("id"), ObjectId):
+            raise ValueError("cursor id is not an ObjectId")
+        return data
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_filter(sort_by: str, sort_order: int, after: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Filter selecting documents strictly after the cursor position.
+    MongoDB sorts missing/null values first, so they need their own clauses.
+    """
+    value, last_id = after["v"], after["id"]
+    id_op = "$lt" if sort_order == -1 else "$gt"
+
+    if value is None:
+        if sort_order == -1:
+            # Nulls are last in descending order: only the remaining nulls follow
+            return {sort_by: None, "_id": {id_op: last_id}}
+        return {"$or": [
+            {sort_by: {"$ne": None}},
+            {sort_by: None, "_id": {id_op: last_id}},
+        ]}
+
+    value_op = "$lt" if sort_order == -1 else "$gt"
+    clauses = [
+        {sort_by: {value_op: value}},
+        {sort_by: value, "_id": {id_op: last_id}},
+    ]
+    if sort_order == -1:
+        clauses.append({sort_by: None})
+    return {"$or": clauses}
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Parse a comma separated `fields=` parameter into a validated field list"""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def fields_projection(requested: List[str], sort_by: str) -> Dict[str, int]:
+    """Mongo projection for the requested fields; the sort key is kept for the cursor"""
+    projection = {f: 1 for f in requested if f != "id"}
+    projection[sort_by] = 1
+    return projection
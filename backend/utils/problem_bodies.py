@@ -0,0 +1,70 @@
+# utils/problem_bodies.py
+
+# Notes and solution code can be many kilobytes per problem, yet only the
+# problem page and the editor show them. They live in `problem_bodies`, keyed
+# by the problem's _id:
+#
+#   {_id: <problem _id>, user_id, notes, solutions}
+#
+# so list, stats and analytics reads only ever touch the slim metadata
+# documents in `problems`. Problems written before the split may still embed
+# the fields until `manage.py split-problem-bodies` has run; readers merge the
+# body over the problem, so both layouts read the same.
+
+from typing import Any, Dict, Iterable, Optional
+from bson import ObjectId
+from db.mongo import db
+
+bodies_collection = db["problem_bodies"]
+
+BODY_FIELDS = ("notes", "solutions")
+
+# Excludes the bodies from reads of not yet migrated problems
+BODY_EXCLUSION = {field: 0 for field in BODY_FIELDS}
+
+# Aggregation stage attaching the body to each problem (one _id lookup each)
+BODY_LOOKUP = {"$lookup": {"from": "problem_bodies", "localField": "_id", "foreignField": "_id", "as": "_body"}}
+
+
+def pop_body(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Remove the body fields from a problem document or update and return them"""
+    return {field: doc.pop(field) for field in BODY_FIELDS if field in doc}
+
+
+def merge_body(doc: Dict[str, Any], body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Put a stored body (or the _body array added by BODY_LOOKUP) back into the problem"""
+    if body is None:
+        looked_up = doc.pop("_body", None) or [{}]
+        body = looked_up[0]
+    for field in BODY_FIELDS:
+        if field in body:
+            doc[field] = body[field]
+    return doc
+
+
+def body_document(problem_id: ObjectId, user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    return {"_id": problem_id, "user_id": user_id, **body}
+
+
+async def insert_bodies(docs: Iterable[Dict[str, Any]]):
+    """Store the bodies of freshly inserted problems; problems without notes or code get none"""
+    docs = [doc for doc in docs if any(doc.get(field) is not None for field in BODY_FIELDS)]
+    if docs:
+        await bodies_collection.insert_many(docs, ordered=False)
+
+
+async def update_body(problem_id: ObjectId, user_id: str, body: Dict[str, Any]):
+    """$set the given body fields, creating the body if the problem had none"""
+    await bodies_collection.update_one(
+        {"_id": problem_id},
+        {"$set": body, "$setOnInsert": {"user_id": user_id}},
+        upsert=True,
+    )
+
+
+async def get_body(problem_id: ObjectId) -> Dict[str, Any]:
+    return await bodies_collection.find_one({"_id": problem_id}, {"_id": 0, "user_id": 0}) or {}
+
+
+async def delete_body(problem_id: ObjectId):
+    await bodies_collection.delete_one({"_id": problem_id})
@@ -0,0 +1,186 @@
+# utils/profiling.py
+
+import asyncio
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from utils.tracing import current_trace
+
+# Off unless explicitly enabled; requests opt in with the admin token
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "1"))
+
+PROFILE_TOKEN_HEADER = b"x-profile-token"
+# "store" (default) writes <request id>.folded to PROFILING_DIR and answers
+# normally; "return" replaces the response body with the collapsed stacks
+PROFILE_OUTPUT_HEADER = b"x-profile-output"
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval from a background
+    thread and counts identical stacks, giving the collapsed format
+    ("outer;inner;leaf count") read by flamegraph.pl, speedscope and friends.
+
+    The event loop thread is shared, so other requests running concurrently
+    show up in the samples too; profile on an otherwise quiet worker for the
+    cleanest picture.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# One profile at a time: the sampler lowers the interpreter's switch interval
+_profile_lock = threading.Lock()
+
+
+def authorized(headers: dict) -> bool:
+    if not (PROFILING_ENABLED and PROFILING_TOKEN):
+        return False
+    supplied = headers.get(PROFILE_TOKEN_HEADER)
+    return supplied is not None and hmac.compare_digest(supplied, PROFILING_TOKEN.encode())
+
+
+def store_profile(name: str, collapsed: str) -> str:
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    path = os.path.join(PROFILING_DIR, f"{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}.folded")
+    with open(path, "w") as f:
+        f.write(collapsed)
+    return path
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware. A request carrying X-Profile-Token equal to
+    PROFILING_TOKEN (with PROFILING_ENABLED=true) runs under StackSampler.
+    The collapsed stacks are stored under PROFILING_DIR (X-Profile header
+    names the file) or, with X-Profile-Output: return, sent back instead of
+    the normal body (X-Profiled-Status carries the original status).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        if not authorized(headers):
+            await self.app(scope, receive, send)
+            return
+        if not _profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, _with_headers(send, [(b"x-profile", b"busy")]))
+            return
+
+        trace = current_trace.get()
+        name = trace.request_id if trace is not None else uuid.uuid4().hex
+        mode = headers.get(PROFILE_OUTPUT_HEADER, b"store").decode("latin-1").lower()
+        switch_interval = sys.getswitchinterval()
+        sampler = StackSampler(threading.get_ident(), PROFILING_INTERVAL_MS / 1000)
+        try:
+            # Let the sampler thread get the GIL about as often as it asks for it
+            sys.setswitchinterval(min(switch_interval, PROFILING_INTERVAL_MS / 1000))
+            sampler.start()
+            started = time.perf_counter()
+            if mode == "return":
+                status = await _run_discarding_body(self.app, scope, receive)
+            else:
+                path_holder = {}
+
+                async def send_with_profile(message):
+                    if message["type"] == "http.response.start":
+                        path_holder["name"] = f"{name}.folded"
+                        message = {**message, "headers": list(message.get("headers") or []) + [
+                            (b"x-profile", path_holder["name"].encode("latin-1")),
+                        ]}
+                    await send(message)
+
+                await self.app(scope, receive, send_with_profile)
+            elapsed_ms = 1000 * (time.perf_counter() - started)
+        finally:
+            # Joining the sampler (up to one interval) and writing the file
+            # happen on a worker thread so other requests keep being served
+            await asyncio.to_thread(sampler.stop)
+            sys.setswitchinterval(switch_interval)
+            _profile_lock.release()
+
+        collapsed = sampler.collapsed()
+        if mode == "return":
+            body = collapsed.encode()
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-profiled-status", str(status).encode()),
+                    (b"x-profile-samples", str(sampler.samples).encode()),
+                    (b"x-profile-duration-ms", f"{elapsed_ms:.1f}".encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+        else:
+            await asyncio.to_thread(store_profile, name, collapsed)
+
+
+async def _run_discarding_body(app, scope, receive) -> int:
+    """Run the app, swallow its response and return the status it sent"""
+    status = 500
+
+    async def discard(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, discard)
+    return status
+
+
+def _with_headers(send, extra):
+    async def wrapper(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": list(message.get("headers") or []) + extra}
+        await send(message)
+    return wrapper
@@ -0,0 +1,107 @@
+# utils/query_cache.py
+
+import os
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of encoded get_problems responses.
+
+    Entries are keyed by (user_id, normalized query params) and hold the
+    response body bytes, so the memory cap counts exactly what is kept. Each
+    entry records the user's data version it was built from and is only
+    served while that version is current; writes also drop the user's
+    entries eagerly through invalidate_user() to free the memory.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, max_entry_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # One huge unfiltered listing should not flush everyone else's views
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else max_bytes // 8
+        self._entries: "OrderedDict[Tuple[str, Hashable], tuple]" = OrderedDict()
+        self._by_user: Dict[str, Set[Tuple[str, Hashable]]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, user_id: str, params: Hashable, version: int) -> Optional[Tuple[bytes, dict]]:
+        key = (user_id, params)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        entry_version, body, headers = entry
+        if entry_version != version:
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body, headers
+
+    def put(self, user_id: str, params: Hashable, version: int, body: bytes, headers: Optional[dict] = None):
+        if not self.enabled or len(body) > self.max_entry_bytes:
+            return
+        key = (user_id, params)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (version, body, dict(headers or {}))
+        self._by_user.setdefault(user_id, set()).add(key)
+        self.bytes += len(body)
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Tuple[str, Hashable]):
+        _, body, _ = self._entries.pop(key)
+        self.bytes -= len(body)
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Drop every cached listing belonging to a user"""
+        keys = list(self._by_user.get(user_id, ()))
+        for key in keys:
+            self._remove(key)
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_user.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Set QUERY_CACHE_SIZE=0 to disable caching
+query_cache = QueryCache(
+    max_entries=int(os.getenv("QUERY_CACHE_SIZE", "1024")),
+    max_bytes=int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
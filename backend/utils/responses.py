@@ -0,0 +1,67 @@
+# utils/responses.py
+
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Type
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from schemas.problem import ProblemInDB, SpacedRepetition
+from utils.tracing import span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode with orjson when available, falling back to the standard library"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class. Uses dumps(), which understands ObjectId and
+    datetime values, so routes can return documents read from MongoDB directly.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return dumps(content)
+
+
+def _trusted_dump(model: Type[BaseModel], doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shape a stored document like model.model_dump() without validating it.
+    Documents in MongoDB were validated on the way in, so the read path only
+    needs to pick the model's fields and fill in defaults for missing ones.
+    """
+    out = {}
+    for name, field in model.model_fields.items():
+        if name in doc:
+            out[name] = doc[name]
+        else:
+            out[name] = field.get_default(call_default_factory=True)
+    return out
+
+
+def serialize_problem(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Trusted read-side equivalent of ProblemInDB(**doc) for a raw Mongo document"""
+    if "_id" in doc:
+        doc["id"] = str(doc.pop("_id"))
+    problem = _trusted_dump(ProblemInDB, doc)
+    sr = problem.get("spaced_repetition")
+    if isinstance(sr, dict):
+        problem["spaced_repetition"] = _trusted_dump(SpacedRepetition, sr)
+    return problem
@@ -0,0 +1,172 @@
+# utils/reviews.py
+
+# Review history lives in its own append-only collection, one document per
+# review, instead of an array embedded in (and growing) every problem:
+#
+#   {user_id, problem_id, date, quality, interval, action}
+#
+# `date` is a native UTC datetime so recent reviews and trends are range
+# scans on (user_id, date). The (user_id, problem_id, date) unique index makes
+# re-inserting the same review a no-op, which keeps migrations and legacy
+# clients that resend their history idempotent.
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from db.mongo import db
+from utils.due_queue import day_start, parse_review_date
+from utils.spaced_repetition import iso_timestamp
+
+reviews_collection = db["reviews"]
+problems_collection = db["problems"]
+
+RECENT_REVIEWS_LIMIT = 10
+# Days covered by the daily quality trend
+TREND_DAYS = 30
+
+
+def review_document(user_id: str, problem_id: str, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Reviews-collection document for a history entry (None if its date is unusable)"""
+    moment = parse_review_date(entry.get("date"))
+    if moment is None:
+        return None
+    return {
+        "user_id": user_id,
+        "problem_id": problem_id,
+        "date": moment,
+        "quality": entry.get("quality"),
+        "interval": entry.get("interval"),
+        "action": entry.get("action") or "reviewed",
+    }
+
+
+def serialize_review(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "problem_id": doc["problem_id"],
+        "date": iso_timestamp(doc["date"]),
+        "quality": doc.get("quality"),
+        "interval": doc.get("interval"),
+        "action": doc.get("action", "reviewed"),
+    }
+
+
+async def record_review(user_id: str, problem_id: str, entry: Dict[str, Any]):
+    """Append one review; a repeat of an already stored review is ignored"""
+    doc = review_document(user_id, problem_id, entry)
+    if doc is None:
+        return
+    try:
+        await reviews_collection.insert_one(doc)
+    except DuplicateKeyError:
+        pass
+
+
+def review_documents(user_id: str, problem_id: str, entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [doc for doc in (review_document(user_id, problem_id, entry) for entry in entries) if doc]
+
+
+async def insert_reviews(docs: List[Dict[str, Any]]) -> int:
+    """Append review documents (of any problems) in one round trip; returns how many were new"""
+    if not docs:
+        return 0
+    try:
+        result = await reviews_collection.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        # Duplicates are reviews stored earlier; any other failure is a real error
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+        return e.details.get("nInserted", 0)
+
+
+async def record_reviews(user_id: str, problem_id: str, entries: Iterable[Dict[str, Any]]) -> int:
+    """Append many reviews of one problem in one round trip; returns how many were new"""
+    return await insert_reviews(review_documents(user_id, problem_id, entries))
+
+
+async def delete_problem_reviews(user_id: str, problem_id: str):
+    await reviews_collection.delete_many({"user_id": user_id, "problem_id": problem_id})
+
+
+async def problem_reviews(user_id: str, problem_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """One problem's reviews, newest first (index scan on user_id, problem_id, date)"""
+    cursor = reviews_collection.find(
+        {"user_id": user_id, "problem_id": problem_id}, {"_id": 0, "user_id": 0}
+    ).sort("date", -1).limit(limit)
+    return [serialize_review(doc) async for doc in cursor]
+
+
+async def recent_reviews(user_id: str, limit: int = RECENT_REVIEWS_LIMIT) -> List[Dict[str, Any]]:
+    """
+    The user's latest reviews with problem titles: the first `limit` entries
+    of the (user_id, date) index plus one $in lookup for the titles.
+    """
+    cursor = reviews_collection.find({"user_id": user_id}, {"_id": 0, "user_id": 0}).sort("date", -1).limit(limit)
+    reviews = [doc async for doc in cursor]
+    if not reviews:
+        return []
+
+    ids = {doc["problem_id"] for doc in reviews if ObjectId.is_valid(doc["problem_id"])}
+    titles = {}
+    async for doc in problems_collection.find({"_id": {"$in": [ObjectId(i) for i in ids]}, "user_id": user_id}, {"title": 1}):
+        titles[str(doc["_id"])] = doc.get("title")
+
+    return [
+        {
+            "problem_id": doc["problem_id"],
+            "problem_title": titles.get(doc["problem_id"]),
+            "review_date": iso_timestamp(doc["date"]),
+            "quality": doc.get("quality"),
+            "action": doc.get("action", "reviewed"),
+        }
+        for doc in reviews
+    ]
+
+
+async def review_stats(user_id: str, days: int = TREND_DAYS, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Review totals and the daily quality trend over the last `days` days in one
+    aggregation. Skips carry no quality, so they count as reviews but not
+    towards the averages.
+    """
+    since = day_start(now or datetime.utcnow()) - timedelta(days=days - 1)
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "total_reviews": {"$sum": 1},
+                    "average_quality": {"$avg": "$quality"},
+                }},
+            ],
+            "trend": [
+                {"$match": {"date": {"$gte": since}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+                    "reviews": {"$sum": 1},
+                    "average_quality": {"$avg": "$quality"},
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+        }},
+    ]
+    result = {}
+    async for doc in reviews_collection.aggregate(pipeline):
+        result = doc
+
+    totals = (result.get("totals") or [{}])[0]
+    average_quality = totals.get("average_quality")
+    return {
+        "total_reviews": totals.get("total_reviews", 0),
+        "average_quality": round(average_quality, 2) if average_quality is not None else None,
+        "quality_trend": [
+            {
+                "date": day["_id"],
+                "reviews": day["reviews"],
+                "average_quality": round(day["average_quality"], 2) if day.get("average_quality") is not None else None,
+            }
+            for day in result.get("trend", [])
+        ],
+    }
@@ -0,0 +1,45 @@
+# utils/search.py
+
+import re
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Notes can be long; only the first distinct words are indexed for prefix lookups
+MAX_NOTE_TOKENS = 200
+
+SEARCH_MODES = ("text", "prefix")
+
+TEXT_SCORE = {"$meta": "textScore"}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def search_tokens(title: Optional[str], notes: Optional[str]) -> List[str]:
+    """
+    Distinct lowercase words of a problem, stored in `search_tokens` and covered
+    by the (user_id, search_tokens) index so prefix queries are anchored scans.
+    """
+    title_tokens = list(dict.fromkeys(tokenize(title)))
+    seen = set(title_tokens)
+    note_tokens = [t for t in dict.fromkeys(tokenize(notes)) if t not in seen]
+    return title_tokens + note_tokens[:MAX_NOTE_TOKENS]
+
+
+def search_clauses(search: str, mode: str) -> List[Dict[str, Any]]:
+    """
+    Mongo filter clauses (to be combined with $and) for a search string.
+
+    text:   $text query over the (title, search_tokens) text index, ranked by textScore
+    prefix: every word of the input must prefix-match a stored token, which
+            suits search-as-you-type where the last word is still incomplete
+    """
+    if mode == "text":
+        return [{"$text": {"$search": search}}]
+    if mode == "prefix":
+        return [{"search_tokens": re.compile("^" + re.escape(w))} for w in tokenize(search)]
+    raise HTTPException(status_code=400, detail=f"search_mode must be one of: {', '.join(SEARCH_MODES)}")
+
@@ -0,0 +1,72 @@
+# utils/spaced_repetition.py
+
+# SM-2 (SuperMemo 2) scheduling, ported from the frontend's spacedRepetition.js
+# so reviews can be applied on the server with a single atomic update. The
+# review history itself is stored in the reviews collection (utils/reviews.py).
+
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from utils.due_queue import next_review_field
+
+
+def iso_timestamp(moment: datetime) -> str:
+    """UTC timestamp in the same format as JavaScript's Date.toISOString()"""
+    return moment.isoformat(timespec="milliseconds") + "Z"
+
+
+def next_schedule(sr: Optional[Dict[str, Any]], quality: int, now: datetime) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Apply one review of the given quality (0-5) to the current spaced
+    repetition state. Returns the new scheduling fields and the history entry.
+    """
+    sr = sr or {}
+    repetitions = sr.get("repetitions", 0)
+    interval = sr.get("interval", 1)
+    easiness = sr.get("easiness", 2.5)
+
+    easiness = max(1.3, easiness + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)))
+
+    if quality >= 3:
+        # Successful recall
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            # Math.round semantics (half rounds up)
+            interval = int(math.floor(interval * easiness + 0.5))
+        repetitions += 1
+    else:
+        # Failed recall - reset to beginning
+        repetitions = 0
+        interval = 1
+
+    schedule = {
+        "repetitions": repetitions,
+        "interval": interval,
+        "easiness": easiness,
+        "next_review": iso_timestamp(now + timedelta(days=interval)),
+        "last_reviewed": iso_timestamp(now),
+    }
+    entry = {"date": schedule["last_reviewed"], "quality": quality, "interval": interval}
+    return schedule, entry
+
+
+def review_update(sr: Optional[Dict[str, Any]], schedule: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Update document applying a review to the problem: only the changed
+    scheduling fields are $set. The history entry goes to the reviews
+    collection, so the problem document does not grow with every review.
+    """
+    due = next_review_field(schedule)
+    if sr is None:
+        # Dotted $set paths cannot be created under a null subdocument
+        return {
+            "$set": {"spaced_repetition": schedule, **due},
+            "$inc": {"review_count": 1},
+        }
+    return {
+        "$set": {**{f"spaced_repetition.{key}": value for key, value in schedule.items()}, **due},
+        "$inc": {"review_count": 1},
+    }
@@ -0,0 +1,89 @@
+# utils/stats.py
+
+from typing import Any, Dict, List
+from db.mongo import db
+
+collection = db["problems"]
+
+# retry_later is stored as "Yes"/"No" by the API, older seed data used booleans
+IS_RETRY = {"$in": ["$retry_later", ["Yes", True]]}
+
+
+def stats_pipeline(user_id: str) -> List[Dict[str, Any]]:
+    """
+    Single $facet pipeline computing every problem statistic the dashboard and
+    the legacy /api/problems/stats endpoint need. Only counts leave the server.
+    """
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "total_problems": {"$sum": 1},
+                    "retry_count": {"$sum": {"$cond": [IS_RETRY, 1, 0]}},
+                    "retry_true_count": {"$sum": {"$cond": [{"$eq": ["$retry_later", True]}, 1, 0]}},
+                    "total_time_minutes": {"$sum": {"$ifNull": ["$time_taken_min", 0]}},
+                }},
+            ],
+            "difficulty": [
+                {"$match": {"difficulty": {"$nin": [None, ""]}}},
+                {"$group": {"_id": "$difficulty", "count": {"$sum": 1}}},
+            ],
+            "tags": [
+                {"$unwind": "$tags"},
+                {"$match": {"tags": {"$nin": [None, ""]}}},
+                {"$group": {
+                    "_id": "$tags",
+                    "total": {"$sum": 1},
+                    "retry": {"$sum": {"$cond": [IS_RETRY, 1, 0]}},
+                }},
+                {"$sort": {"total": -1, "_id": 1}},
+            ],
+            "solved_dates": [
+                {"$match": {"date_solved": {"$nin": [None, ""]}}},
+                {"$group": {"_id": "$date_solved", "count": {"$sum": 1}}},
+            ],
+        }},
+    ]
+
+
+async def aggregate_problem_stats(user_id: str) -> Dict[str, Any]:
+    """Run the stats pipeline and normalize the facet output into plain dicts"""
+    result = {}
+    async for doc in collection.aggregate(stats_pipeline(user_id)):
+        result = doc
+
+    totals = (result.get("totals") or [{}])[0]
+    return {
+        "total_problems": totals.get("total_problems", 0),
+        "retry_count": totals.get("retry_count", 0),
+        "retry_true_count": totals.get("retry_true_count", 0),
+        "total_time_minutes": totals.get("total_time_minutes", 0),
+        "difficulty": {d["_id"]: d["count"] for d in result.get("difficulty", [])},
+        "tags": [
+            {"tag": t["_id"], "total": t["total"], "retry": t["retry"]}
+            for t in result.get("tags", [])
+        ],
+        "solved_dates": {str(d["_id"]): d["count"] for d in result.get("solved_dates", [])},
+    }
+
+
+def legacy_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Response shape of GET /api/problems/stats"""
+    if not stats["total_problems"]:
+        return {
+            "total_solved": 0,
+            "by_difficulty": {},
+            "most_common_tags": [],
+            "total_time_minutes": 0,
+            "retry_later_count": 0
+        }
+
+    return {
+        "total_solved": stats["total_problems"],
+        "by_difficulty": stats["difficulty"],
+        "most_common_tags": [t["tag"] for t in stats["tags"][:5]],
+        "total_time_minutes": stats["total_time_minutes"],
+        "retry_later_count": stats["retry_true_count"]
+    }
@@ -0,0 +1,203 @@
+# utils/summary.py
+
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from db.mongo import db
+from utils.stats import aggregate_problem_stats
+from utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+summaries_collection = db["user_summaries"]
+
+# Aggregations before giving up when concurrent writes keep changing the summary
+MAX_REBUILD_ATTEMPTS = 3
+
+
+def encode_key(key: str) -> str:
+    """Escape a tag/date so it can be used as a MongoDB field name in $inc paths"""
+    return key.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def decode_key(key: str) -> str:
+    return unquote(key)
+
+
+def is_retry(problem: Dict) -> bool:
+    return problem.get("retry_later") in ("Yes", True)
+
+
+def summary_delta(problem: Optional[Dict], sign: int = 1) -> Counter:
+    """Counter of $inc paths contributed by a single problem (negated when sign=-1)"""
+    delta = Counter()
+    if not problem:
+        return delta
+
+    retry = is_retry(problem)
+    delta["total_problems"] += sign
+    if retry:
+        delta["retry_count"] += sign
+
+    difficulty = problem.get("difficulty")
+    if difficulty:
+        delta[f"difficulty.{encode_key(difficulty)}"] += sign
+
+    for tag in problem.get("tags") or []:
+        if not tag:
+            continue
+        tag_key = encode_key(tag)
+        delta[f"tags.{tag_key}.total"] += sign
+        if retry:
+            delta[f"tags.{tag_key}.retry"] += sign
+
+    date_solved = problem.get("date_solved")
+    if date_solved:
+        delta[f"solved_dates.{encode_key(str(date_solved))}"] += sign
+
+    return delta
+
+
+async def apply_summary_change(user_id: str, before: Optional[Dict] = None, after: Optional[Dict] = None):
+    """
+    Apply the difference between two versions of a problem to the user's summary
+    with a single atomic $inc. Pass before=None for inserts and after=None for deletes.
+
+    A summary that does not exist yet is created holding only the delta and
+    marked partial, so the next read rebuilds it from the problems.
+    """
+    delta = summary_delta(after, 1)
+    delta.update(summary_delta(before, -1))
+    await apply_summary_delta(user_id, delta)
+
+
+async def apply_summary_delta(user_id: str, delta: Counter):
+    """$inc a combined delta (e.g. the sum of many inserted problems) in one update"""
+    inc = {path: value for path, value in delta.items() if value}
+    if not inc:
+        return
+    try:
+        await summaries_collection.update_one(
+            {"user_id": user_id},
+            {
+                # rev lets rebuild_user_summary detect deltas that land while it aggregates
+                "$inc": {**inc, "rev": 1},
+                "$set": {"updated_at": datetime.utcnow().isoformat()},
+                "$setOnInsert": {"partial": True},
+            },
+            upsert=True,
+        )
+    except PyMongoError as e:
+        # A drifted summary is repaired by rebuild_user_summary; never fail the write
+        logger.warning("Failed to update summary for %s: %s", user_id, e)
+
+
+def summary_from_stats(user_id: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a complete summary document from utils.stats.aggregate_problem_stats output"""
+    return {
+        "user_id": user_id,
+        "total_problems": stats["total_problems"],
+        "retry_count": stats["retry_count"],
+        "difficulty": {encode_key(d): count for d, count in stats["difficulty"].items()},
+        "tags": {
+            encode_key(t["tag"]): {"total": t["total"], "retry": t["retry"]}
+            for t in stats["tags"]
+        },
+        "solved_dates": {encode_key(d): count for d, count in stats["solved_dates"].items()},
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+
+
+async def rebuild_user_summary(user_id: str) -> Dict[str, Any]:
+    """
+    Recompute a user's summary on the server and replace the stored copy.
+    The copy is only replaced if no delta was applied while aggregating
+    (compare-and-set on rev); otherwise the aggregation is repeated. If writes
+    keep winning, the fresh summary is returned but not stored, and a partial
+    copy is rebuilt again on the next read.
+    """
+    for _ in range(MAX_REBUILD_ATTEMPTS):
+        current = await summaries_collection.find_one({"user_id": user_id}, {"rev": 1})
+        rev = current.get("rev") if current else None
+        summary = summary_from_stats(user_id, await aggregate_problem_stats(user_id))
+        summary["rev"] = rev or 0
+        try:
+            if current is None:
+                await summaries_collection.insert_one(summary)
+                stored = True
+            else:
+                result = await summaries_collection.replace_one({"user_id": user_id, "rev": rev}, summary)
+                stored = result.matched_count == 1
+        except DuplicateKeyError:
+            # A delta created a partial summary while we aggregated
+            stored = False
+        summary.pop("_id", None)
+        if stored:
+            return summary
+    logger.warning("Summary for %s kept changing during rebuild; not stored", user_id)
+    return summary
+
+
+@traced("analytics.get_user_summary")
+async def get_user_summary(user_id: str) -> Dict[str, Any]:
+    """Return the stored summary, building it on first use or if it is partial"""
+    summary = await summaries_collection.find_one({"user_id": user_id}, {"_id": 0})
+    if summary is None or summary.get("partial"):
+        summary = await rebuild_user_summary(user_id)
+    return summary
+
+
+@traced("analytics.basic_stats_from_summary")
+def basic_stats_from_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Same shape as analytics.calculate_basic_stats, read from a summary document"""
+    difficulty = summary.get("difficulty") or {}
+    tag_counts = [
+        (decode_key(tag), stats.get("total", 0))
+        for tag, stats in (summary.get("tags") or {}).items()
+        if stats.get("total", 0) > 0
+    ]
+    tag_counts.sort(key=lambda x: x[1], reverse=True)
+
+    return {
+        "total_problems": max(summary.get("total_problems", 0), 0),
+        "retry_count": max(summary.get("retry_count", 0), 0),
+        "total_active_days": sum(1 for count in (summary.get("solved_dates") or {}).values() if count > 0),
+        "difficulty_breakdown": {
+            "easy": difficulty.get("Easy", 0),
+            "medium": difficulty.get("Medium", 0),
+            "hard": difficulty.get("Hard", 0)
+        },
+        "most_used_tags": [{"tag": tag, "count": count} for tag, count in tag_counts[:5]]
+    }
+
+
+@traced("analytics.weaknesses_from_summary")
+def weaknesses_from_summary(summary: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Same rules as analytics.detect_weaknesses, read from a summary document"""
+    weaknesses = []
+    for tag, stats in (summary.get("tags") or {}).items():
+        total = stats.get("total", 0)
+        retry_count = stats.get("retry", 0)
+        if total >= 3:
+            retry_rate = retry_count / total
+            if retry_rate > 0.30:
+                weaknesses.append({
+                    "tag": decode_key(tag),
+                    "retry_rate": round(retry_rate * 100),
+                    "total_problems": total,
+                    "retry_count": retry_count
+                })
+
+    weaknesses.sort(key=lambda x: x["retry_rate"], reverse=True)
+    return weaknesses
+
+
+def solved_date_counts(summary: Dict[str, Any]) -> Dict[str, int]:
+    return {
+        decode_key(date_str): count
+        for date_str, count in (summary.get("solved_dates") or {}).items()
+        if count > 0
+    }
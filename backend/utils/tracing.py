@@ -0,0 +1,240 @@
+# utils/tracing.py
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import monitoring
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Requests slower than this go to the slow log
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "500"))
+# Slow log destination: a JSON-lines file, "-" for stdout, or empty (default)
+TRACE_SLOW_LOG = os.getenv("TRACE_SLOW_LOG", "")
+# Export every trace (not just slow ones): a file, "-" for stdout, or empty
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "")
+# Bound the memory a single request can spend on spans (e.g. long exports)
+MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))
+
+
+class Trace:
+    """Spans recorded for one request, relative to its start"""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self.open = True
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: float, **attrs):
+        with self._lock:
+            # Background tasks inherit the context; ignore them once the response is out
+            if not self.open:
+                return
+            if len(self.spans) >= MAX_SPANS:
+                self.dropped += 1
+                return
+            span = {
+                "name": name,
+                "start_ms": round(1000 * (start - self.started), 3),
+                "duration_ms": round(1000 * (end - start), 3),
+            }
+            if attrs:
+                span["attrs"] = attrs
+            self.spans.append(span)
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Span time and count per category (the part of the name before the first dot)"""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for span in self.spans:
+                category = span["name"].split(".", 1)[0]
+                entry = totals.setdefault(category, {"duration_ms": 0.0, "count": 0})
+                entry["duration_ms"] += span["duration_ms"]
+                entry["count"] += 1
+        return totals
+
+    def server_timing(self) -> str:
+        entries = [
+            f'{category};dur={entry["duration_ms"]:.1f};desc="{entry["count"]}x"'
+            for category, entry in self.totals().items()
+        ]
+        entries.append(f"app;dur={1000 * (time.perf_counter() - self.started):.1f}")
+        return ", ".join(entries)
+
+
+current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block as a span of the current request (no-op outside a request)"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter(), **attrs)
+
+
+def traced(name: str):
+    """Decorator recording each call of a sync or async function as a span"""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TraceCommandListener(monitoring.CommandListener):
+    """Adds a mongo.<command> span for every MongoDB command a request issues"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, "ok")
+
+    def failed(self, event):
+        self._record(event, "error")
+
+    def _record(self, event, outcome: str):
+        trace = current_trace.get()
+        if trace is None:
+            return
+        end = time.perf_counter()
+        attrs = {"db": event.database_name}
+        if outcome != "ok":
+            attrs["outcome"] = outcome
+        trace.add(f"mongo.{event.command_name}", end - event.duration_micros / 1e6, end, **attrs)
+
+
+trace_command_listener = TraceCommandListener()
+
+
+class JsonlExporter:
+    """Appends one JSON object per line to a file, or writes to stdout for "-" """
+
+    def __init__(self, destination: str):
+        self.destination = destination
+        self._file = None
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self.destination == "-":
+                sys.stdout.write(line)
+                sys.stdout.flush()
+                return
+            if self._file is None:
+                directory = os.path.dirname(self.destination)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.destination, "a", buffering=1)
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+slow_log = JsonlExporter(TRACE_SLOW_LOG) if TRACE_SLOW_LOG else None
+trace_exporter = JsonlExporter(TRACE_EXPORT) if TRACE_EXPORT else None
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware: starts a Trace per HTTP request (reusing an incoming
+    X-Request-ID), returns X-Request-ID and Server-Timing headers, and writes
+    the finished trace to the slow log and/or exporter.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(REQUEST_ID_HEADER.lower().encode())
+        request_id = incoming.decode("latin-1")[:128] if incoming else uuid.uuid4().hex
+        trace = Trace(request_id)
+        token = current_trace.set(trace)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers") or [])
+                headers.append((REQUEST_ID_HEADER.lower().encode(), request_id.encode("latin-1")))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = 1000 * (time.perf_counter() - trace.started)
+            trace.open = False
+            current_trace.reset(token)
+            slow = duration_ms >= TRACE_SLOW_MS
+            if (slow and slow_log is not None) or trace_exporter is not None:
+                await self._export(scope, trace, status, duration_ms, slow)
+
+    @staticmethod
+    async def _export(scope, trace: Trace, status: int, duration_ms: float, slow: bool):
+        route = getattr(scope.get("route"), "path", None)
+        record = {
+            "request_id": trace.request_id,
+            "at": datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "totals": trace.totals(),
+            "spans": trace.spans,
+            "dropped_spans": trace.dropped,
+        }
+        # Serializing and writing the record blocks, so keep it off the event loop
+        await asyncio.to_thread(TracingMiddleware._write, record, slow)
+
+    @staticmethod
+    def _write(record: Dict[str, Any], slow: bool):
+        try:
+            if slow and slow_log is not None:
+                slow_log.export(record)
+            if trace_exporter is not None:
+                trace_exporter.export(record)
+        except OSError:
+            pass
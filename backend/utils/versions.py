@@ -0,0 +1,84 @@
+# utils/versions.py
+
+import hashlib
+import logging
+from typing import Iterable, Optional
+from fastapi import Request, Response
+from db.mongo import db
+
+logger = logging.getLogger(__name__)
+
+versions_collection = db["data_versions"]
+
+
+async def bump_version(user_id: str):
+    """
+    Advance the user's data version after a write. Called once the write has
+    landed, so a response tagged with an older version can only be staler
+    than the data, never newer. Failures are logged and swallowed like the
+    summary updates: the write itself has already succeeded.
+    """
+    try:
+        await versions_collection.update_one(
+            {"user_id": user_id},
+            {"$inc": {"version": 1}},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.warning("Failed to bump data version for %s: %s", user_id, e)
+
+
+async def bump_versions(user_ids: Iterable[str]):
+    """
+    bump_version for several users in one update_many. Only existing version
+    documents are bumped; the write routes upsert them.
+    """
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return
+    try:
+        await versions_collection.update_many({"user_id": {"$in": user_ids}}, {"$inc": {"version": 1}})
+    except Exception as e:
+        logger.warning("Failed to bump data versions for %d users: %s", len(user_ids), e)
+
+
+async def get_version(user_id: str) -> int:
+    doc = await versions_collection.find_one({"user_id": user_id}, {"version": 1})
+    return (doc or {}).get("version", 0)
+
+
+def make_etag(version: int, *parts) -> str:
+    """
+    Weak ETag for a user's data version plus whatever else the response
+    depends on (query parameters, today's date for rotating content).
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so the W/ prefix is ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def cache_headers(etag: str) -> dict:
+    # no-cache: the browser may store the response but must revalidate it
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+async def conditional_etag(request: Request, user_id: str, *parts) -> tuple[int, str, Optional[Response]]:
+    """
+    Current data version, the ETag for the request, and a 304 response if
+    the client already holds it. Costs one indexed find_one, before any
+    problems are read.
+    """
+    version = await get_version(user_id)
+    etag = make_etag(version, request.url.path, *parts)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return version, etag, Response(status_code=304, headers=cache_headers(etag))
+    return version, etag, None
@@ -7,6 +7,9 @@ import { useState, useEffect } from "react";
 import { problemsAPI, analyticsAPI } from "@/lib/api";
 import { toast } from "sonner";
 
+// SM-2 recall quality recorded by "Mark reviewed" (3: recalled with effort)
+const REVIEWED_QUALITY = 3;
+
 export function TodaysRevision({ revision, lockedByServer = false, className = "", onRevisionUpdate, onAfterUnlock }) {
   const navigate = useNavigate();
   const [loading, setLoading] = useState(false);
@@ -116,18 +119,15 @@ export function TodaysRevision({ revision, lockedByServer = false, className = "
   const handleCompleteReviewFuture = async () => {
     setLoading(true);
     try {
-      // Update review_count by incrementing it
-      const currentReviewCount = revision.review_count || 0;
-      const updateData = {
-        review_count: currentReviewCount + 1
-      };
+      // The server applies SM-2 and bumps review_count atomically, so
+      // concurrent reviews (e.g. two tabs) cannot overwrite each other
+      const response = await problemsAPI.reviewProblem(revision.id, REVIEWED_QUALITY);
 
-      await problemsAPI.updateProblem(revision.id, updateData);
-      
       // Update local state
       const updatedProblem = {
         ...revision,
-        review_count: currentReviewCount + 1
+        review_count: response.data.review_count,
+        spaced_repetition: response.data.spaced_repetition
       };
       
       if (onRevisionUpdate) {
@@ -149,7 +149,7 @@ export function TodaysRevision({ revision, lockedByServer = false, className = "
       }, 3000);
 
     } catch (error) {
-      console.error("Failed to update review count:", error);
+      console.error("Failed to record review:", error);
       toast.error("Failed to update review. Please try again.");
     } finally {
       setLoading(false);
@@ -117,6 +117,14 @@ export const problemsAPI = {
     return api.put(`/api/problems/${id}`, cleanData);
   },
 
+  // Record a spaced repetition review; SM-2 runs on the server (blocked in demo)
+  reviewProblem: (id, quality) => {
+    if (isDemoMode()) {
+      return Promise.reject(new Error('Demo mode: review disabled'));
+    }
+    return api.post(`/api/problems/${id}/review`, { quality });
+  },
+
   // Delete a problem (blocked in demo)
   deleteProblem: (id) => {
     if (isDemoMode()) {
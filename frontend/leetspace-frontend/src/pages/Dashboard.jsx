@@ -1,7 +1,7 @@
 import { useEffect, useState } from 'react';
 import { useAuth } from "@/context/AuthContext";
 import { useDemo } from "@/context/DemoContext";
-import { analyticsAPI, problemsAPI } from '@/lib/api';
+import { analyticsAPI } from '@/lib/api';
 import { StatCard } from '@/components/dashboard/StatCard';
 import { ActivityHeatmap } from '@/components/dashboard/ActivityHeatmap';
 import { WeaknessCard } from '@/components/dashboard/WeaknessCard';
@@ -22,7 +22,6 @@ import {
   Plus,
   RefreshCw
 } from 'lucide-react';
-import { toast } from 'sonner';
 
 export default function Dashboard() {
   const { user } = useAuth();
@@ -83,41 +82,13 @@ export default function Dashboard() {
     navigate(`/problems?tag=${tag}&filter=weakness`);
   };
 
-  const handleRevisionUpdate = async (updatedProblem) => {
-    try {
-      // Update the problem in the local state immediately for responsive UI
-      if (data && data.todays_revision && data.todays_revision.id === updatedProblem.id) {
-        setData(prevData => ({
-          ...prevData,
-          todays_revision: updatedProblem
-        }));
-      }
-
-      // Update the problem in the backend
-      if (!isDemo) {
-        // Extract only the spaced repetition data to send to backend
-        const updateData = {
-          spaced_repetition: updatedProblem.spaced_repetition
-        };
-        
-        // Debug logging
-        await problemsAPI.updateProblem(updatedProblem.id, updateData);
-      } else {
-        // Demo mode: just log the update
-      }
-    } catch (error) {
-      console.error('❌ Failed to update spaced repetition data:', error);
-      
-      // Show error toast
-      toast.error('Failed to save revision progress. Please try again.');
-      
-      // Revert local state change on error
-      if (data && data.todays_revision && data.todays_revision.id === updatedProblem.id) {
-        setData(prevData => ({
-          ...prevData,
-          todays_revision: data.todays_revision // Revert to original
-        }));
-      }
+  const handleRevisionUpdate = (updatedProblem) => {
+    // TodaysRevision has already saved the change; just reflect it here
+    if (data && data.todays_revision && data.todays_revision.id === updatedProblem.id) {
+      setData(prevData => ({
+        ...prevData,
+        todays_revision: updatedProblem
+      }));
     }
   };
 